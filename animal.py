@@ -6,18 +6,27 @@ Created on Sat Nov 21 14:16:25 2020
 """
 
 import random
+from stencil import available_neighbours
+from species import ZEBRA, LION, MAX_AGE_RANGE, REPRODUCTION_TIME_RANGE, HUNGER_LIMIT, PREDATION
 
 class Animal():
     
+    # name and code (index in the species tables) of the species, class
+    # attributes shared by all its animals, set by each subclass
+    species = None
+    species_code = None
+    
+    # no per-animal __dict__: only the state drawn or updated for each animal
+    __slots__ = ("cell", "MAX_AGE", "REPRODUCTION_TIME", "age", "time_since_last_meal",
+                 "time_since_reproduction", "alive")
+    
     # Initializer method
-    def __init__(self, species, cell, max_age, reproduction_time, is_new_born):
+    def __init__(self, cell, max_age, reproduction_time, is_new_born):
         """
         Initializes a new animal
 
         Parameters
         ----------
-        species : str
-            DESCRIPTION.
         cell : Grid_cell
             DESCRIPTION.
         max_age : int
@@ -32,7 +41,6 @@ class Animal():
         None.
         """
                      
-        self.species = species
         self.cell = cell
         self.MAX_AGE = max_age
         self.REPRODUCTION_TIME = reproduction_time
@@ -57,7 +65,7 @@ class Animal():
            str: String summarizing the object
         """
         
-        s = self.species + " at position "+ str(self.position) +":, age="+str(self.age)+", time_since_last_meal="+\
+        s = self.species + " at position "+ str(self.get_position()) +":, age="+str(self.age)+", time_since_last_meal="+\
            str(self.time_since_last_meal)
         return s
     
@@ -124,9 +132,8 @@ class Animal():
 
         """       
         
-        # the only possible case of eating is if the attacker is a Lion
-        # and the victim is a Zebra
-        return (self.species == "Lion" and other.species == "Zebra")
+        # lookup in the predation matrix (e.g. Lion eats Zebra)
+        return PREDATION[self.species_code][other.species_code]
 
 
     def time_passes(self):
@@ -183,8 +190,9 @@ class Animal():
             
         """
         
-        # possible conditions of hunger death by species
-        return (self.species == "Lion" and self.time_since_last_meal == 6)
+        # hunger limit of the species, 0 if it never dies of hunger (e.g. Zebra)
+        hunger_limit = HUNGER_LIMIT[self.species_code]
+        return (hunger_limit > 0 and self.time_since_last_meal == hunger_limit)
         
     
     def get_offspring_position(self, all_animals, animal_positions):
@@ -214,7 +222,7 @@ class Animal():
         # list of animals around self, of the same species, and capable of reproducing
         possible_parent = [a for a in all_animals
                            if(a.get_position() in neighbour_positions and 
-                              a.species == self.species and a.can_reproduce())]
+                              a.species_code == self.species_code and a.can_reproduce())]
         
         # existential check for parent
         if(len(possible_parent) > 0):
@@ -258,18 +266,121 @@ class Animal():
             return available_neighbours[0][random.randint(0, len(available_neighbours[0]) - 1)]
         """
         
+    def pick_neighbour(self, all_animals, animal_positions, hunting_field=None, occupancy=None):
+        """
+        Picks the neighbour self moves to: a random neighbour containing prey
+        if there is one, otherwise a random empty neighbour, otherwise its
+        own cell. Prey is looked up in the predation matrix, so zebras (which
+        eat nothing) only move to empty neighbours. When hunting, empty
+        neighbours closest to prey in sight are preferred.
+
+        Parameters
+        ----------
+        all_animals : list of Animals
+            The animals (zebras and lions) in the simulation.
+        animal_positions : list of tuples of ints
+            The positions of the animals in the simulation.
+        hunting_field : 2D array of ints, optional
+            Distance of each cell to the nearest prey of self, the same for
+            all cells out of sight (see distance_field.hunting_fields). The
+            default is None (no hunting).
+        occupancy : 2D array of ints, optional
+            Species code of the animal in each cell, -1 for empty cells, up
+            to date with animal_positions. If given, neighbours are looked
+            up in it, in time proportional to the number of neighbours
+            instead of the number of animals. The default is None.
+
+        Returns
+        -------
+        Grid_cell
+            The cell self moves to.
+
+        """
+        
+        can_eat = PREDATION[self.species_code]  # species self can eat
+        other_neighbours = []
+        prey_neighbours = []
+        
+        if(occupancy is not None):
+            # empty neighbours and neighbours containing prey, LRTB
+            allowed = (-1,) + tuple(code for code in range(len(can_eat)) if can_eat[code])
+            ring = available_neighbours(self.get_position(), occupancy, 1,
+                                        self.cell.metric, allowed)[0]
+            
+            # classify neighbours as being empty or containing prey
+            for row, col in ring.tolist():
+                
+                if(occupancy[row, col] != -1):
+                    prey_neighbours.append(self.cell.grid[row][col])
+                
+                else:
+                    other_neighbours.append(self.cell.grid[row][col])
+        
+        else:
+            # positions of animals self can eat, and of the others which are avoided
+            prey_positions = set()
+            avoid_positions = set()
+            
+            for i in range(len(animal_positions)):
+                
+                if(can_eat[all_animals[i].species_code]):
+                    prey_positions.add(animal_positions[i])
+                
+                else:
+                    avoid_positions.add(animal_positions[i])
+            
+            # get neighbours containing prey or empty (others excluded by avoid list)
+            neighbours = self.cell.get_available_neighbours(avoid_positions)
+            
+            # classify neighbours as being empty or containing prey
+            for neighbour in neighbours[0]:
+                
+                if(neighbour.position in prey_positions):
+                    prey_neighbours.append(neighbour)
+                
+                else:
+                    other_neighbours.append(neighbour)
+        
+        # move to prey neighbours either on chance or if no empty neighbour
+        # only if prey neighbours exist
+        if(len(prey_neighbours) > 0):
+            return prey_neighbours[random.randint(0, len(prey_neighbours) - 1)]
+        
+        # move to empty neighbours based on chance and empty neighbours existing
+        elif(len(other_neighbours) > 0):
+            
+            # hunting: only keep the empty neighbours closest to prey
+            # (all of them if no prey is in sight, as they're equally far)
+            if(hunting_field is not None):
+                distances = [hunting_field[n.position] for n in other_neighbours]
+                closest = min(distances)
+                
+                other_neighbours = [other_neighbours[i] for i in range(len(other_neighbours))
+                                    if(distances[i] == closest)]
+            
+            return other_neighbours[random.randint(0, len(other_neighbours) - 1)]
+        
+        # if surrounded, don't move (returning own positions will prevent moving)
+        else:
+            return self.cell
+        
+        
     # end of Animal class
     
     
 class Zebra(Animal):
     
+    species = "Zebra"
+    species_code = ZEBRA
+    
+    __slots__ = ()
+    
     def __init__(self, cell, is_new_born):
         
-        species = "Zebra"
-        max_age = random.randint(8, 10)
-        reproduction_time = random.randint(3, 4)
+        max_age = random.randint(*MAX_AGE_RANGE[ZEBRA])
+        reproduction_time = random.randint(*REPRODUCTION_TIME_RANGE[ZEBRA])
         
-        Animal.__init__(self, species, cell, max_age, reproduction_time, is_new_born)
+        Animal.__init__(self, cell, max_age, reproduction_time, is_new_born)
         
         
     def get_child(self, cell):
@@ -291,50 +402,24 @@ class Zebra(Animal):
         return Zebra(cell, True)
     
     
-    def pick_neighbour(self, all_animals, animal_positions):
-        """
-        ...
-
-        Parameters
-        ----------
-        all_animals : list of Animals
-            The animals (zebras and lions) in the simulation.
-        animal_positions : list of tuples of ints
-            The positions of the animals in the simulation.
-
-        Returns
-        -------
-        TYPE
-            DESCRIPTION.
-
-        """
-        
-        #avoid_positions = [animal_positions[i] for i in range(len(animal_positions))]
-        
-        available_neighbours = self.cell.get_available_neighbours(animal_positions)
-        
-        if(len(available_neighbours[0]) == 0):
-            return self.cell
-        
-        else:
-            return available_neighbours[0][random.randint(0, len(available_neighbours[0]) - 1)]
-    
-    
-    
     # End of Zebra class
     
     
 class Lion(Animal):
     
+    species = "Lion"
+    species_code = LION
+    
+    __slots__ = ("aggressivity",)
+    
     def __init__(self, cell, is_new_born):
         
         self.aggressivity = round(random.random(), 2)
         
-        species = "Lion"
-        max_age = random.randint(16, 22)
-        reproduction_time = random.randint(6, 8)
+        max_age = random.randint(*MAX_AGE_RANGE[LION])
+        reproduction_time = random.randint(*REPRODUCTION_TIME_RANGE[LION])
         
-        Animal.__init__(self, species, cell, max_age, reproduction_time, is_new_born)
+        Animal.__init__(self, cell, max_age, reproduction_time, is_new_born)
         
         
     def get_child(self, cell):
@@ -354,55 +439,7 @@ class Lion(Animal):
         """
         
         return Lion(cell, True)
-    
-    def pick_neighbour(self, all_animals, animal_positions):
-        """
-        ...
 
-        Parameters
-        ----------
-        all_animals : list of Animals
-            The animals (zebras and lions) in the simulation.
-        animal_positions : list of tuples of ints
-            The positions of the animals in the simulation.
 
-        Returns
-        -------
-        Grid_cell
-            DESCRIPTION.
-
-        """
-        
-        # list of animal position excluding positions held by Lions
-        avoid_positions = [animal_positions[i] for i in range(len(animal_positions))
-                           if(isinstance(all_animals[i], Lion))]
-        
-        # get neighbours containing zebras or empty (lions excluded by avoid list)
-        available_neighbours = self.cell.get_available_neighbours(avoid_positions)
-        other_neighbours = []
-        zebra_neighbours = []
-        
-        # classify neighbours as being empty or containing zebras
-        for neighbour in available_neighbours[0]:
-            
-            if(not(neighbour.position in animal_positions)):
-                other_neighbours.append(neighbour)
-            
-            elif(all_animals[animal_positions.index(neighbour.position)].species == "Zebra"):
-                zebra_neighbours.append(neighbour)
-                
-            else:
-                print("Error in neighbour selection... have fun!")
-        
-        # move to zebra neighbours either on chance or if no empty neighbour
-        # only if zebra neighbours exist
-        if(len(zebra_neighbours) > 0):
-            return zebra_neighbours[random.randint(0, len(zebra_neighbours) - 1)]
-        
-        # move to empty neighbours based on chance and empty neighbours existing
-        elif(len(other_neighbours) > 0):
-            return other_neighbours[random.randint(0, len(other_neighbours) - 1)]
-        
-        # if surrounded by lions, don't move (returning own positions will prevent moving)
-        else:
-            return self.cell
\ No newline at end of file
+# class of the animals of each species, indexed by species code
+ANIMAL_CLASSES = [Zebra, Lion]
\ No newline at end of file
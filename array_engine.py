@@ -0,0 +1,263 @@
+import time
+import numpy as np
+from population import Population
+from species import ZEBRA, LION, HUNGER_LIMIT, PREDATION
+from stencil import ring_offsets
+from distance_field import hunting_fields
+
+
+# width of the tiles of colour classes, cells of a class are at least this far
+# apart so their neighbourhoods (radius 1) can't overlap
+TILE_SIZE = 3
+
+
+class ArrayEngine():
+    """
+    The simulation on arrays (see population.Population) instead of Animal
+    and Grid_cell objects. Same interface as simulator.ReferenceEngine.
+
+    Movement is vectorized: cells are coloured by their position in a 3x3
+    tiling and all the animals of a colour move at once, one colour after
+    the other. Animals of the same colour can't reach the same cell, so
+    their moves never conflict.
+
+    There is no reproduction phase: it only matches the reference as long
+    as the reference never finds a parent (see step), so
+    simulator.run_whole_simulation and memory.choose_engine warn when it's
+    used.
+    """
+
+    # no births, see step
+    models_births = False
+
+    def __init__(self, grid_size, state, seed, sight_radius=0, metric="chebyshev"):
+        if (isinstance(state, Population)):
+            self.population = state
+        else:
+            self.population = Population.from_state(state)
+
+        self.grid_size = grid_size
+        self.sight_radius = sight_radius
+        self.metric = metric
+        self.rng = np.random.default_rng(seed)
+
+        # distance of each cell to the prey of each species, when hunting
+        self.fields = None
+
+        # species tables as arrays, for lookups of many animals at once
+        self.predation = np.array(PREDATION, dtype=bool)
+        self.hunger_limit = np.array(HUNGER_LIMIT, dtype=np.int32)
+
+        # (row, col) offsets of the immediate neighbours, LRTB (a subset of
+        # the 3x3 tile with either metric, so colour classes stay conflict-free)
+        self.offsets = ring_offsets(1, metric)[0]
+
+        # index and species code of the animal in each cell, -1 for empty cells
+        self.cell_animal = np.full((grid_size, grid_size), -1, dtype=np.int64)
+        self.occupancy = np.full((grid_size, grid_size), -1, dtype=np.int8)
+        self.update_cells()
+
+    def update_cells(self):
+        """
+        Writes the index and species of every animal in its cell.
+
+        Returns
+        -------
+        None.
+        """
+
+        population = self.population
+
+        self.cell_animal.fill(-1)
+        self.cell_animal[population.row, population.column] = np.arange(len(population))
+
+        self.occupancy.fill(-1)
+        self.occupancy[population.row, population.column] = population.species
+
+    def remove_dead_animals(self, alive):
+        """
+        Removes the animals which aren't alive from every array.
+
+        Parameters
+        ----------
+        alive : array of booleans
+            True for the animals to keep.
+
+        Returns
+        -------
+        None.
+        """
+
+        population = self.population
+
+        for attribute in ("row", "column", "species", "age", "max_age", "reproduction_time",
+                          "time_since_last_meal", "time_since_reproduction"):
+            setattr(population, attribute, getattr(population, attribute)[alive])
+
+        self.update_cells()
+
+    def age_hunger(self):
+        """
+        Increases the age of all animals at once and removes those dying of
+        hunger or of old age, as simulator.age_hunger.
+
+        Returns
+        -------
+        None.
+        """
+
+        population = self.population
+
+        # one time step is added to age and time since last meal
+        population.age += 1
+        population.time_since_last_meal += 1
+        population.time_since_reproduction += 1
+
+        # hunger limit of each animal's species, 0 if it never dies of hunger
+        hunger_limit = self.hunger_limit[population.species]
+
+        dies = ((population.age == population.max_age) |
+                ((hunger_limit > 0) & (population.time_since_last_meal == hunger_limit)))
+
+        if (dies.any()):
+            self.remove_dead_animals(~dies)
+
+    def move_colour(self, movers, alive):
+        """
+        Moves all the given animals at once. Each picks a random neighbour
+        with prey if there is one, otherwise a random empty neighbour,
+        otherwise stays, as Animal.pick_neighbour. Prey which is moved onto
+        is eaten.
+
+        Parameters
+        ----------
+        movers : array of ints
+            Indices of the animals to move, whose neighbourhoods don't overlap.
+        alive : array of booleans
+            True for the animals which haven't been eaten, updated with the meals.
+
+        Returns
+        -------
+        None.
+        """
+
+        population = self.population
+        grid_size = self.grid_size
+
+        # (movers, 8) positions of the neighbours of each mover
+        rows = population.row[movers, None] + self.offsets[:, 0]
+        columns = population.column[movers, None] + self.offsets[:, 1]
+        on_grid = (rows >= 0) & (rows < grid_size) & (columns >= 0) & (columns < grid_size)
+
+        # animal in each neighbour, off-grid neighbours read as empty and are masked
+        occupant = self.cell_animal[np.clip(rows, 0, grid_size - 1), np.clip(columns, 0, grid_size - 1)]
+        is_empty = on_grid & (occupant == -1)
+        is_prey = on_grid & (occupant >= 0) & self.predation[population.species[movers, None],
+                                                             population.species[occupant]]
+
+        # hunting: only the empty neighbours closest to prey (all of them if
+        # no prey is in sight, as they're equally far)
+        if (self.fields is not None):
+            distance = self.fields[population.species[movers, None], rows.clip(0, grid_size - 1),
+                                   columns.clip(0, grid_size - 1)]
+            distance[~is_empty] = self.sight_radius + 2
+            is_empty &= (distance == distance.min(axis=1)[:, None])
+
+        # prey neighbours if any, otherwise empty ones
+        has_prey = is_prey.any(axis=1)
+        candidates = np.where(has_prey[:, None], is_prey, is_empty)
+
+        # random candidate of each mover: highest random key among candidates
+        keys = self.rng.random(candidates.shape)
+        keys[~candidates] = -1.0
+        choice = keys.argmax(axis=1)
+
+        # movers without candidate stay
+        moves = candidates.any(axis=1)
+        movers, choice, has_prey = movers[moves], choice[moves], has_prey[moves]
+
+        target_row = rows[moves, choice]
+        target_column = columns[moves, choice]
+
+        # eaters eat the prey in their target (zebras never move onto lions,
+        # as they only move to empty cells)
+        meals = self.cell_animal[target_row[has_prey], target_column[has_prey]]
+        alive[meals] = False
+        population.time_since_last_meal[movers[has_prey]] = 0
+
+        # move in bulk: free the old cells, then take the new ones
+        self.cell_animal[population.row[movers], population.column[movers]] = -1
+        self.occupancy[population.row[movers], population.column[movers]] = -1
+        self.cell_animal[target_row, target_column] = movers
+        self.occupancy[target_row, target_column] = population.species[movers]
+
+        population.row[movers] = target_row
+        population.column[movers] = target_column
+
+    def move_animals(self):
+        """
+        Moves every animal once, one colour class of the 3x3 tiling at a time,
+        LRTB. Animals keep the colour of the cell they started the time period
+        in, so that they don't move again after moving onto another colour.
+
+        Returns
+        -------
+        None.
+        """
+
+        population = self.population
+        alive = np.ones(len(population), dtype=bool)
+
+        # one distance field per species for the whole time period, species
+        # eating nothing see no prey
+        if (self.sight_radius > 0):
+            self.fields = np.full((len(PREDATION), self.grid_size, self.grid_size),
+                                  self.sight_radius + 1, dtype=np.int32)
+
+            for code, field in enumerate(hunting_fields(self.occupancy, self.sight_radius,
+                                                                self.metric)):
+                if (field is not None):
+                    self.fields[code] = field
+
+        colour = (population.row % TILE_SIZE) * TILE_SIZE + population.column % TILE_SIZE
+
+        for c in range(TILE_SIZE * TILE_SIZE):
+            # animals of this colour which haven't been eaten yet
+            movers = np.flatnonzero((colour == c) & alive)
+
+            if (len(movers) > 0):
+                self.move_colour(movers, alive)
+
+        if (not alive.all()):
+            self.remove_dead_animals(alive)
+
+    def step(self, timings=None):
+        phase_start = time.perf_counter()
+        self.age_hunger()
+
+        age_hunger_end = time.perf_counter()
+        self.move_animals()
+
+        # no reproduction phase: simulator.reproduce_animals never finds a
+        # parent (get_offspring_position compares methods with positions),
+        # so the reference engine has no births to match. Results differ as
+        # soon as it does, hence the models_births flag
+
+        if (timings != None):
+            timings["age_hunger"] = age_hunger_end - phase_start
+            timings["move"] = time.perf_counter() - age_hunger_end
+            timings["reproduce"] = 0.0
+
+    def get_state(self):
+        return self.population.get_state()
+
+    def get_counts(self):
+        counts = np.bincount(self.population.species, minlength=len(PREDATION))
+        return int(counts[ZEBRA]), int(counts[LION])
+
+    def get_occupancy(self):
+        # read-only view, no copy: it follows the engine from step to step
+        occupancy = self.occupancy.view()
+        occupancy.flags.writeable = False
+
+        return occupancy
@@ -0,0 +1,255 @@
+import random
+import math
+from collections import namedtuple
+from simulator import create_grid, initialize_population, get_state, ReferenceEngine
+
+
+# first time period at which two engines disagree, and a description of how
+Divergence = namedtuple("Divergence", ["time", "details"])
+
+
+def initial_state(grid_size, number_zebra, number_lion, seed):
+    """
+    Creates the starting state shared by the engines being compared.
+
+    Parameters
+    ----------
+    grid_size : int
+        The size of the grid.
+    number_zebra : int
+        Number of zebras at the beginning of the simulation.
+    number_lion : int
+        Number of lions at the beginning of the simulation.
+    seed : int
+        Seed of the random placement and attributes of the animals.
+
+    Returns
+    -------
+    list of tuples
+        The animals, as returned by simulator.get_state.
+    """
+
+    saved_state = random.getstate()
+    random.seed(seed)
+
+    state = get_state(initialize_population(create_grid(grid_size), grid_size,
+                                            number_zebra, number_lion))
+
+    random.setstate(saved_state)
+
+    return state
+
+
+def compare_exact(candidate, grid_size, number_zebra, number_lion,
+                  simulation_duration, seed, reference=ReferenceEngine, sight_radius=0,
+                  metric="chebyshev", state=None):
+    """
+    Steps a reference and a candidate engine side by side from the same
+    state and random seed, comparing every animal after each time period.
+    Only meaningful for engines drawing the same random numbers in the
+    same order as the reference.
+
+    Parameters
+    ----------
+    candidate : engine class
+        Engine under test, see simulator.ReferenceEngine for the interface.
+    grid_size : int
+        The size of the grid.
+    number_zebra : int
+        Number of zebras at the beginning of the simulation.
+    number_lion : int
+        Number of lions at the beginning of the simulation.
+    simulation_duration : int
+        Number of time periods to compare.
+    seed : int
+        Seed of the initial state and of both engines.
+    reference : engine class, optional
+        Engine trusted to be correct. The default is ReferenceEngine.
+    sight_radius : int, optional
+        Distance at which predators see prey in both engines, 0 for no
+        hunting. The default is 0.
+    metric : str, optional
+        Shape of neighbourhoods in both engines, "chebyshev" or "manhattan".
+        The default is "chebyshev".
+    state : list of tuples, optional
+        The starting animals, as returned by simulator.get_state, e.g. to
+        test a given situation. The default is None (number_zebra and
+        number_lion animals placed by seed).
+
+    Returns
+    -------
+    Divergence or None
+        The first time period at which the states differ, with the animals
+        only found in either engine, or None if they never differ.
+    """
+
+    if (state is None):
+        state = initial_state(grid_size, number_zebra, number_lion, seed)
+
+    reference_engine = reference(grid_size, state, seed, sight_radius, metric)
+    candidate_engine = candidate(grid_size, state, seed, sight_radius, metric)
+
+    for time in range(simulation_duration):
+        reference_engine.step()
+        candidate_engine.step()
+
+        reference_state = reference_engine.get_state()
+        candidate_state = candidate_engine.get_state()
+
+        if (reference_state != candidate_state):
+            only_reference = sorted(set(reference_state).difference(candidate_state))
+            only_candidate = sorted(set(candidate_state).difference(reference_state))
+
+            details = "only in reference: %s\nonly in candidate: %s" % (only_reference,
+                                                                        only_candidate)
+            return Divergence(time, details)
+
+    return None
+
+
+def run_counts(engine, grid_size, state, seed, simulation_duration, sight_radius=0,
+               metric="chebyshev"):
+    """
+    Runs an engine and records its number of zebras and lions.
+
+    Parameters
+    ----------
+    engine : engine class
+        The engine to run.
+    grid_size : int
+        The size of the grid.
+    state : list of tuples
+        The starting animals, as returned by simulator.get_state.
+    seed : int
+        Seed of the engine.
+    simulation_duration : int
+        Number of time periods to run.
+    sight_radius : int, optional
+        Distance at which predators see prey, 0 for no hunting. The default is 0.
+    metric : str, optional
+        Shape of neighbourhoods, "chebyshev" or "manhattan". The default is "chebyshev".
+
+    Returns
+    -------
+    zebra_count : list of ints
+        Number of zebras after each time period.
+    lion_count : list of ints
+        Number of lions after each time period.
+    """
+
+    running_engine = engine(grid_size, state, seed, sight_radius, metric)
+    zebra_count, lion_count = [], []
+
+    for time in range(simulation_duration):
+        running_engine.step()
+
+        zebras, lions = running_engine.get_counts()
+        zebra_count.append(zebras)
+        lion_count.append(lions)
+
+    return zebra_count, lion_count
+
+
+def welch_statistic(sample_1, sample_2):
+    """
+    Calculates Welch's t statistic for the difference of two means.
+
+    Parameters
+    ----------
+    sample_1 : list of numbers
+        First sample.
+    sample_2 : list of numbers
+        Second sample.
+
+    Returns
+    -------
+    float
+        The absolute t statistic, infinite if the means differ but neither
+        sample varies, 0 if the samples are identical constants.
+    """
+
+    n_1, n_2 = len(sample_1), len(sample_2)
+    mean_1, mean_2 = sum(sample_1) / n_1, sum(sample_2) / n_2
+
+    variance_1 = sum([(x - mean_1) ** 2 for x in sample_1]) / max(1, n_1 - 1)
+    variance_2 = sum([(x - mean_2) ** 2 for x in sample_2]) / max(1, n_2 - 1)
+
+    standard_error = math.sqrt(variance_1 / n_1 + variance_2 / n_2)
+
+    if (standard_error == 0):
+        return 0.0 if (mean_1 == mean_2) else math.inf
+
+    return abs(mean_1 - mean_2) / standard_error
+
+
+def compare_distributions(candidate, grid_size, number_zebra, number_lion,
+                          simulation_duration, seeds, threshold=4.0,
+                          reference=ReferenceEngine, sight_radius=0, metric="chebyshev"):
+    """
+    Runs a reference and a candidate engine from the same states, one per
+    seed, and compares the distributions of their zebra and lion counts at
+    every time period. Used when the candidate can't draw the same random
+    numbers as the reference.
+
+    Parameters
+    ----------
+    candidate : engine class
+        Engine under test, see simulator.ReferenceEngine for the interface.
+    grid_size : int
+        The size of the grid.
+    number_zebra : int
+        Number of zebras at the beginning of each simulation.
+    number_lion : int
+        Number of lions at the beginning of each simulation.
+    simulation_duration : int
+        Number of time periods to compare.
+    seeds : list of ints
+        One seed per pair of runs, for the initial state and both engines.
+    threshold : float, optional
+        Welch statistic above which the counts of a time period are
+        considered different. High by default since every time period of
+        both species is tested. The default is 4.0.
+    reference : engine class, optional
+        Engine trusted to be correct. The default is ReferenceEngine.
+    sight_radius : int, optional
+        Distance at which predators see prey in both engines, 0 for no
+        hunting. The default is 0.
+    metric : str, optional
+        Shape of neighbourhoods in both engines, "chebyshev" or "manhattan".
+        The default is "chebyshev".
+
+    Returns
+    -------
+    Divergence or None
+        The first time period at which the count distributions differ,
+        with their means, or None if they never differ.
+    """
+
+    # counts[engine_index][species_index] is a list of runs, each a list of counts
+    counts = [([], []), ([], [])]
+
+    for seed in seeds:
+        state = initial_state(grid_size, number_zebra, number_lion, seed)
+
+        for engine_index, engine in ((0, reference), (1, candidate)):
+            zebra_count, lion_count = run_counts(engine, grid_size, state, seed,
+                                                 simulation_duration, sight_radius, metric)
+
+            counts[engine_index][0].append(zebra_count)
+            counts[engine_index][1].append(lion_count)
+
+    for time in range(simulation_duration):
+
+        for species_index, species in ((0, "Zebra"), (1, "Lion")):
+            reference_sample = [c[time] for c in counts[0][species_index]]
+            candidate_sample = [c[time] for c in counts[1][species_index]]
+
+            statistic = welch_statistic(reference_sample, candidate_sample)
+
+            if (statistic > threshold):
+                details = "%s: mean %.2f in reference, %.2f in candidate (t = %.2f)" % (
+                    species, sum(reference_sample) / len(reference_sample),
+                    sum(candidate_sample) / len(candidate_sample), statistic)
+                return Divergence(time, details)
+
+    return None
@@ -0,0 +1,119 @@
+import numpy as np
+from species import PREDATION
+from stencil import ring_offsets
+
+
+def shift_or(source, target, row_offset, column_offset):
+    """
+    Marks in target every cell which is at (row_offset, column_offset) of
+    a marked cell of source, without wrapping around the grid.
+
+    Parameters
+    ----------
+    source : 2D array of booleans
+        The marked cells.
+    target : 2D array of booleans
+        Updated with the shifted cells.
+    row_offset, column_offset : int
+        The shift.
+
+    Returns
+    -------
+    None.
+    """
+
+    size = len(source)
+
+    rows_from = slice(max(0, -row_offset), size - max(0, row_offset))
+    rows_to = slice(max(0, row_offset), size - max(0, -row_offset))
+    columns_from = slice(max(0, -column_offset), size - max(0, column_offset))
+    columns_to = slice(max(0, column_offset), size - max(0, -column_offset))
+
+    target[rows_to, columns_to] |= source[rows_from, columns_from]
+
+
+def distance_field(sources, sight_radius, metric="chebyshev"):
+    """
+    Calculates the distance of every cell to the nearest source cell, with
+    a single breadth-first search from all sources at once, one ring of
+    cells per step.
+
+    Parameters
+    ----------
+    sources : 2D array of booleans
+        True for the cells distances are measured from (e.g. zebras).
+    sight_radius : int
+        Furthest distance searched.
+    metric : str, optional
+        "chebyshev" (a step reaches the 8 immediate neighbours, as animals
+        move) or "manhattan", see stencil.distance. The default is "chebyshev".
+
+    Returns
+    -------
+    field : 2D array of ints
+        Distance to the nearest source, sight_radius + 1 if it is further
+        than sight_radius.
+    """
+
+    field = np.full(sources.shape, sight_radius + 1, dtype=np.int32)
+    field[sources] = 0
+
+    reached = sources.copy()
+    frontier = sources
+
+    for d in range(1, sight_radius + 1):
+        # cells one step from the frontier which weren't reached before
+        grown = np.zeros_like(reached)
+
+        for row_offset, column_offset in ring_offsets(1, metric)[0].tolist():
+            shift_or(frontier, grown, row_offset, column_offset)
+
+        frontier = grown & ~reached
+
+        if (not frontier.any()):
+            break
+
+        field[frontier] = d
+        reached |= frontier
+
+    return field
+
+
+def hunting_fields(occupancy, sight_radius, metric="chebyshev"):
+    """
+    Calculates, for each species, the distance of every cell to the nearest
+    animal it can eat (see species.PREDATION).
+
+    Parameters
+    ----------
+    occupancy : 2D array of ints
+        Species code of the animal in each cell, -1 for empty cells.
+    sight_radius : int
+        Furthest distance at which prey is seen.
+    metric : str, optional
+        "chebyshev" or "manhattan", see distance_field. The default is "chebyshev".
+
+    Returns
+    -------
+    fields : list of 2D arrays of ints
+        fields[species] is the distance field of the prey of species (see
+        distance_field), None for species eating nothing.
+    """
+
+    fields = [None] * len(PREDATION)
+
+    # one search per set of prey, shared by the species eating the same ones
+    searched = {}
+
+    for code, can_eat in enumerate(PREDATION):
+        prey = tuple(meal for meal in range(len(can_eat)) if can_eat[meal])
+
+        if (len(prey) == 0):
+            continue
+
+        if (prey not in searched):
+            searched[prey] = distance_field(np.isin(occupancy, prey), sight_radius, metric)
+
+        fields[code] = searched[prey]
+
+    return fields
@@ -6,9 +6,15 @@ Created on Tue Nov 24 20:13:20 2020
 """
 
 
+from stencil import ring_offset_tuples
+
+
 class Grid_cell():
 
-    def __init__(self, position):
+    # no per-cell __dict__: a grid has one cell per position
+    __slots__ = ("position", "metric", "grid")
+
+    def __init__(self, position, metric="chebyshev"):
         """
         Constructor method
 
@@ -16,6 +22,9 @@ class Grid_cell():
         ----------
         position : tuple of int
             The position (row,col) of the cell.
+        metric : str, optional
+            Shape of the rings, "chebyshev" (squares) or "manhattan"
+            (diamonds), see stencil.distance. The default is "chebyshev".
 
         Returns
         -------
@@ -24,13 +33,38 @@ class Grid_cell():
         """
 
         self.position = position  # cell's position (row,col)
+        self.metric = metric
 
-        # List of lists of neighbours, where list n is the neighbours that are on
-        # the 'ring' n + 1 units away
-        self.neighbours = [[], [], []]
+        # grid self belongs to, shared by all its cells (see define_neighbours).
+        # Grid and cells are a reference cycle, freed by the cyclic garbage
+        # collector, so that neighbour queries don't need the grid passed in
+        self.grid = None
 
     def get_neighbours(self, up_to_distance):
-        return [self.neighbours[i] for i in range(up_to_distance)]
+        """
+        Finds the neighbours of self from the precomputed offsets of each
+        ring (see stencil.ring_offset_tuples), instead of storing them in
+        every cell.
+
+        Parameters
+        ----------
+        up_to_distance : int
+            The furthest ring of neighbours.
+
+        Returns
+        -------
+        list of lists of Grid_cells
+            List n is the neighbours on the ring n + 1 units away, LRTB.
+        """
+
+        my_row, my_col = self.position
+        grid = self.grid
+        grid_size = len(grid)
+
+        # neighbours can't be off the grid
+        return [[grid[my_row + i][my_col + j] for i, j in offsets
+                 if (0 <= my_row + i < grid_size and 0 <= my_col + j < grid_size)]
+                for offsets in ring_offset_tuples(up_to_distance, self.metric)]
 
     def get_position(self):
         return self.position
@@ -43,7 +77,8 @@ class Grid_cell():
 
     def define_neighbours(self, grid):
         """
-        Creates a list of all the neighbours of self in grid
+        Links self to grid, in which its neighbours are found when needed
+        (see get_neighbours)
 
         Parameters
         ----------
@@ -56,69 +91,31 @@ class Grid_cell():
         None.
         """
 
-        my_row = self.position[0]  # row of self
-        my_col = self.position[1]  # col of self
-
-        # Max dist is len of array (e.g. 4) but we only go to len - 1 (e.g. 3)
-        max_dist = len(self.neighbours)
-
-        grid_size = len(grid)  # size of the grid
-
-        # Start and end row to generate neighbours, can't be lower than 0 or higher
-        # than  grid_size respectively
-        start_row = max(0, my_row - max_dist)
-        end_row = min(grid_size, my_row + max_dist + 1)
-
-        # Start and end column to generate neighbours, can't be lower than 0 or higher
-        # than  grid_size respectively
-        start_col = max(0, my_col - max_dist)
-        end_col = min(grid_size, my_col + max_dist + 1)
-
-        # if row is 5 and radius max is 3, cycle from 2 (incl.) to 9 (excl.)
-        for i in range(start_row, end_row):
-
-            # if col is 5 and radius max is 3, cycle from 2 (incl.) to 9 (excl.)
-            for j in range(start_col, end_col):
-
-                # calculate the max grid distance (either vert or horiz) from position
-                # 2 2 2 2 2 2 2
-                # 2 1 1 1 1 1 2
-                # 2 1 0 0 0 1 2
-                # 2 1 0 P 0 1 2
-                # 2 1 0 0 0 1 2
-                # 2 1 1 1 1 1 2
-                # 2 2 2 2 2 2 2 
-                ring_distance_from_position = max(abs(my_row - i), abs(my_col - j))
-
-                if (ring_distance_from_position > 0):
-                    self.neighbours[ring_distance_from_position - 1].append(grid[i][j])
+        self.grid = grid
 
     def get_available_neighbours(self, avoid_positions=[], up_to_distance=1):
         """
-        ...
+        Finds the neighbours of self which aren't at any of avoid_positions
 
         Parameters
         ----------
-        avoid_positions : list of tuples of ints, optional
-            DESCRIPTION. The default is [].
-        selected_distance : int, optional
-            DESCRIPTION. The default is 1.
+        avoid_positions : list or set of tuples of ints, optional
+            Positions of the neighbours to leave out. The default is [].
+        up_to_distance : int, optional
+            The furthest ring of neighbours. The default is 1.
 
         Returns
         -------
-        available_neighbours : list of Grid_cells
-            DESCRIPTION.
+        available_neighbours : list of lists of Grid_cells
+            List n is the available neighbours on the ring n + 1 units away.
 
         """
 
-        available_neighbours = [[] * up_to_distance]
-
-        # If is_empty is False, then available_neighbours is self.neighbours.
-        # If is_empty is True, then available_neighbours is elements of
-        # self.neighbours that are also devoid of an animal.
-        for d in range(up_to_distance):
-            available_neighbours[d].extend([self.neighbours[d][i]
-                                            for i in range(len(self.neighbours[d]))
-                                            if (not (self.neighbours[d][i].position in avoid_positions))])
+        # looked up in a set, instead of scanning the positions for every neighbour
+        if (not isinstance(avoid_positions, (set, frozenset))):
+            avoid_positions = set(avoid_positions)
 
-        return available_neighbours
+        # neighbours of each ring which aren't at any of avoid_positions
+        return [[neighbour for neighbour in ring
+                 if (not (neighbour.position in avoid_positions))]
+                for ring in self.get_neighbours(up_to_distance)]
@@ -0,0 +1,308 @@
+from collections import defaultdict
+from species import HUNGER_LIMIT
+
+
+class LifecycleScheduler():
+    """
+    Schedules the deaths (old age and hunger) and the reproduction
+    eligibility of animals in buckets of time periods, so that a time
+    period only processes the animals with an event due, instead of every
+    animal.
+
+    Counters (age, time since last meal and since reproduction) are settled
+    lazily: each animal's counters are exact as of the time period it was
+    last settled at, and are brought up to date when it's processed (see
+    settle). Deadlines are countdowns from MAX_AGE, the hunger limit and
+    REPRODUCTION_TIME, so they're known as soon as an animal is settled.
+
+    Buckets may keep events which aren't due anymore (e.g. the hunger of an
+    animal which has eaten since, or an eaten animal): they're skipped when
+    their time period comes: dead animals are forgotten (see remove), and
+    the others are checked with their own methods.
+
+    Once an animal can reproduce, it stays able to until it reproduces, so
+    it's tried at every reproduction phase without being settled: its time
+    since reproduction was at least REPRODUCTION_TIME when it became
+    eligible and only grows. For the same reason, can_reproduce is exact
+    for every animal without settling (see due_reproductions).
+
+    Eligible animals leave the eligible set when they reproduce or die. As
+    long as reproduction never succeeds (Animal.get_offspring_position
+    compares methods with positions, so it finds no parent), they only
+    leave it by dying. The set then grows to most of the population, and
+    the reproduction phase gains nothing asymptotically over checking
+    every animal: only ageing and hunger do.
+    """
+
+    def __init__(self, all_animals, time=0):
+        """
+        Schedules the events of animals whose counters are exact.
+
+        Parameters
+        ----------
+        all_animals : list of Animals
+            The animals (zebras and lions) in the simulation.
+        time : int, optional
+            Current time period. The default is 0.
+
+        Returns
+        -------
+        None.
+        """
+
+        self.time = time
+
+        # time period at which each animal's counters were exact
+        self.settled_time = {}
+
+        # animals with a death or a reproduction eligibility due at each time period
+        self.deaths = defaultdict(list)
+        self.eligibilities = defaultdict(list)
+
+        # animals able to reproduce, checked at every reproduction phase
+        self.eligible = set()
+
+        for animal in all_animals:
+            self.add(animal)
+
+    def settle(self, animal):
+        """
+        Brings the counters of animal up to the current time period.
+
+        Parameters
+        ----------
+        animal : Animal
+            A scheduled animal.
+
+        Returns
+        -------
+        None.
+        """
+
+        elapsed = self.time - self.settled_time[animal]
+
+        if (elapsed > 0):
+            animal.age += elapsed
+            animal.time_since_last_meal += elapsed
+            animal.time_since_reproduction += elapsed
+
+            self.settled_time[animal] = self.time
+
+    def settle_all(self, all_animals):
+        """
+        Brings the counters of all animals up to the current time period,
+        e.g. before reading them with simulator.get_state.
+
+        Parameters
+        ----------
+        all_animals : list of Animals
+            The animals (zebras and lions) in the simulation.
+
+        Returns
+        -------
+        None.
+        """
+
+        for animal in all_animals:
+            self.settle(animal)
+
+    def schedule_death(self, animal):
+        """
+        Schedules the deaths of old age and of hunger of a settled animal.
+        Animals die when a counter reaches its limit exactly (see
+        Animal.dies_of_old_age and Animal.dies_of_hunger), so nothing is
+        scheduled for counters already past it.
+
+        Parameters
+        ----------
+        animal : Animal
+            An animal whose counters are exact.
+
+        Returns
+        -------
+        None.
+        """
+
+        if (animal.age < animal.MAX_AGE):
+            self.deaths[self.time + animal.MAX_AGE - animal.age].append(animal)
+
+        self.schedule_hunger(animal, animal.time_since_last_meal)
+
+    def schedule_hunger(self, animal, time_since_last_meal):
+        """
+        Schedules the death of hunger of an animal.
+
+        Parameters
+        ----------
+        animal : Animal
+            A scheduled animal.
+        time_since_last_meal : int
+            Exact time since the animal's last meal.
+
+        Returns
+        -------
+        None.
+        """
+
+        hunger_limit = HUNGER_LIMIT[animal.species_code]
+
+        if (time_since_last_meal < hunger_limit):
+            self.deaths[self.time + hunger_limit - time_since_last_meal].append(animal)
+
+    def schedule_eligibility(self, animal):
+        """
+        Schedules the time period from which a settled animal can
+        reproduce, or makes it eligible now.
+
+        Parameters
+        ----------
+        animal : Animal
+            An animal whose counters are exact.
+
+        Returns
+        -------
+        None.
+        """
+
+        if (animal.can_reproduce()):
+            self.eligible.add(animal)
+        else:
+            self.eligibilities[self.time + animal.REPRODUCTION_TIME
+                               - animal.time_since_reproduction].append(animal)
+
+    def add(self, animal):
+        """
+        Schedules a new animal (e.g. a child) whose counters are exact.
+
+        Parameters
+        ----------
+        animal : Animal
+            The new animal.
+
+        Returns
+        -------
+        None.
+        """
+
+        self.settled_time[animal] = self.time
+
+        self.schedule_death(animal)
+        self.schedule_eligibility(animal)
+
+    def remove(self, animal):
+        """
+        Forgets an animal which has died or been eaten. Its events left in
+        the buckets are skipped when they come.
+
+        Parameters
+        ----------
+        animal : Animal
+            The dead animal.
+
+        Returns
+        -------
+        None.
+        """
+
+        self.settled_time.pop(animal, None)
+        self.eligible.discard(animal)
+
+    def meal(self, eater, prey):
+        """
+        Reschedules the death of hunger of an animal which is eating in the
+        current time period, and forgets its prey (see simulator.move_animals).
+
+        Parameters
+        ----------
+        eater : Animal
+            The animal eating.
+        prey : Animal
+            The animal eaten.
+
+        Returns
+        -------
+        None.
+        """
+
+        self.settle(eater)
+        self.schedule_hunger(eater, 0)
+
+        self.remove(prey)
+
+    def advance(self):
+        """
+        Moves to the next time period and finds the animals dying in it.
+
+        Returns
+        -------
+        dying : list of Animals
+            The animals dying of old age or of hunger, settled, still alive
+            so that their position can be found before they're set dead.
+        """
+
+        self.time += 1
+        dying = []
+
+        for animal in self.deaths.pop(self.time, []):
+            # skip eaten or already dying animals, and events which aren't due anymore
+            if (animal not in self.settled_time):
+                continue
+
+            self.settle(animal)
+
+            if (animal.dies_of_old_age() or animal.dies_of_hunger()):
+                self.remove(animal)
+                dying.append(animal)
+
+        return dying
+
+    def due_reproductions(self):
+        """
+        Finds the animals which can reproduce in the current time period.
+
+        Returns
+        -------
+        list of Animals
+            The animals able to reproduce, LRTB (the order of
+            simulator.sort_animals).
+        """
+
+        for animal in self.eligibilities.pop(self.time, []):
+            # skip dead animals and events which aren't due anymore
+            if (animal not in self.settled_time):
+                continue
+
+            self.settle(animal)
+
+            if (animal.can_reproduce()):
+                self.eligible.add(animal)
+
+        # only the eligible animals are sorted, not the whole population
+        return sorted(self.eligible, key=lambda animal: animal.cell.position)
+
+    def reproduced(self, candidates):
+        """
+        Reschedules the animals which have just reproduced: their time
+        since reproduction was set back to 0 in the current time period,
+        while their other counters may be behind.
+
+        Parameters
+        ----------
+        candidates : list of Animals
+            The animals tried for reproduction, see due_reproductions.
+
+        Returns
+        -------
+        None.
+        """
+
+        for animal in candidates:
+            if (not animal.can_reproduce()):
+                elapsed = self.time - self.settled_time[animal]
+
+                animal.age += elapsed
+                animal.time_since_last_meal += elapsed
+                self.settled_time[animal] = self.time
+
+                self.eligible.discard(animal)
+                self.schedule_eligibility(animal)
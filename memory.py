@@ -0,0 +1,353 @@
+import os
+import gc
+import warnings
+import tracemalloc
+import contextlib
+from collections import namedtuple
+from functools import lru_cache
+import numpy as np
+from population import seed_population
+
+
+# bytes used by an engine for each cell of the grid and each animal (including
+# the peak of a time period), and for each count stored in the results
+MemoryProfile = namedtuple("MemoryProfile", ["bytes_per_cell", "bytes_per_animal", "bytes_per_count"])
+
+
+def measure_engine(engine_class, grid_size, number_zebra, number_lion, seed=0):
+    """
+    Measures the memory used by an engine with tracemalloc, numpy arrays
+    included.
+
+    Parameters
+    ----------
+    engine_class : engine class
+        The engine, see simulator.ReferenceEngine for the interface.
+    grid_size : int
+        The size of the grid.
+    number_zebra : int
+        Number of zebras.
+    number_lion : int
+        Number of lions.
+    seed : int, optional
+        Seed of the animals and of the engine. The default is 0.
+
+    Returns
+    -------
+    built : int
+        Bytes kept by the engine once created.
+    step_peak : int
+        Additional bytes at the peak of a time period.
+    """
+
+    tracing = tracemalloc.is_tracing()
+
+    if (not tracing):
+        tracemalloc.start()
+
+    # garbage in reference cycles (e.g. the grids of earlier reference
+    # engines, whose cells refer to their grid) is only freed when the cyclic
+    # collector runs: free it now, or it may be freed during the measurement
+    # and subtracted from the engine's memory
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+
+    # only what the engine keeps is counted, the population is dropped if unused
+    population = seed_population(grid_size, number_zebra, number_lion,
+                                 rng=np.random.default_rng(seed))
+    engine = engine_class(grid_size, population, seed)
+    del population
+
+    built = tracemalloc.get_traced_memory()[0] - before
+
+    # the reference engine prints during reproduction, not measured
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        # same for the cycles left by creating the engine
+        gc.collect()
+        tracemalloc.reset_peak()
+        step_start = tracemalloc.get_traced_memory()[0]
+
+        engine.step()
+
+        step_peak = tracemalloc.get_traced_memory()[1] - step_start
+
+    if (not tracing):
+        tracemalloc.stop()
+
+    return built, step_peak
+
+
+def measure_count_buffer(repeat_count, simulation_duration):
+    """
+    Measures the memory of the count matrices of run_whole_simulation
+    (list of lists of ints), with counts too large to be cached by Python.
+
+    Parameters
+    ----------
+    repeat_count : int
+        Number of repetitions (rows).
+    simulation_duration : int
+        Number of time periods (columns).
+
+    Returns
+    -------
+    int
+        Bytes of one count matrix.
+    """
+
+    tracing = tracemalloc.is_tracing()
+
+    if (not tracing):
+        tracemalloc.start()
+
+    before = tracemalloc.get_traced_memory()[0]
+
+    counts = [[1000 + j for j in range(simulation_duration)] for k in range(repeat_count)]
+    size = tracemalloc.get_traced_memory()[0] - before
+    del counts
+
+    if (not tracing):
+        tracemalloc.stop()
+
+    return size
+
+
+def measure_costs(engine_class, grid_size, number_zebra, number_lion):
+    """
+    Measures the bytes per cell and per animal of an engine, from an empty
+    grid and the same grid with animals.
+
+    Parameters
+    ----------
+    engine_class : engine class
+        The engine, see simulator.ReferenceEngine for the interface.
+    grid_size : int
+        The size of the grid.
+    number_zebra : int
+        Number of zebras.
+    number_lion : int
+        Number of lions.
+
+    Returns
+    -------
+    bytes_per_cell : float
+        Bytes of the empty grid, per cell.
+    bytes_per_animal : float
+        Additional bytes with the animals, kept and at the peak of a time
+        period, per animal.
+    """
+
+    # grid alone, then grid and animals: the difference is due to the animals
+    empty_built, empty_step = measure_engine(engine_class, grid_size, 0, 0)
+    built, step_peak = measure_engine(engine_class, grid_size, number_zebra, number_lion)
+
+    bytes_per_cell = empty_built / (grid_size * grid_size)
+    bytes_per_animal = ((built - empty_built + max(0, step_peak - empty_step))
+                        / max(1, number_zebra + number_lion))
+
+    return bytes_per_cell, bytes_per_animal
+
+
+@lru_cache(maxsize=None)
+def profile_engine(engine_class, grid_size=40, density=0.25):
+    """
+    Measures the bytes per cell and per animal of an engine on a small
+    grid, to estimate the memory of larger simulations.
+
+    Parameters
+    ----------
+    engine_class : engine class
+        The engine, see simulator.ReferenceEngine for the interface.
+    grid_size : int, optional
+        The size of the grid measured. The default is 40.
+    density : float, optional
+        Fraction of the cells with an animal, 3 zebras per lion. The default is 0.25.
+
+    Returns
+    -------
+    MemoryProfile
+        Bytes per cell, per animal and per stored count.
+    """
+
+    number_animals = int(grid_size * grid_size * density)
+    number_lion = number_animals // 4
+
+    # first use of an engine allocates caches which aren't per cell or animal
+    measure_engine(engine_class, 3, 1, 1)
+
+    bytes_per_cell, bytes_per_animal = measure_costs(engine_class, grid_size,
+                                                     number_animals - number_lion, number_lion)
+    bytes_per_count = measure_count_buffer(10, 100) / 1000
+
+    return MemoryProfile(bytes_per_cell, bytes_per_animal, bytes_per_count)
+
+
+def estimate_memory(profile, grid_size, number_animals, simulation_duration, repeat_count,
+                    engine_count=1):
+    """
+    Estimates the memory of a simulation before running it.
+
+    Parameters
+    ----------
+    profile : MemoryProfile
+        Memory profile of the engine, see profile_engine.
+    grid_size : int
+        The size of the grid.
+    number_animals : int
+        Number of animals at the beginning of the simulation.
+    simulation_duration : int
+        Number of time periods.
+    repeat_count : int
+        Number of repetitions kept in the results.
+    engine_count : int, optional
+        Number of engines in memory at once (e.g. one per process). The default is 1.
+
+    Returns
+    -------
+    int
+        Estimated bytes.
+    """
+
+    engine_bytes = (profile.bytes_per_cell * grid_size * grid_size
+                    + profile.bytes_per_animal * number_animals)
+
+    # one matrix of counts per species
+    result_bytes = 2 * profile.bytes_per_count * simulation_duration * repeat_count
+
+    return int(engine_count * engine_bytes + result_bytes)
+
+
+def format_bytes(size):
+    """
+    Formats a number of bytes in the largest unit it has at least one of.
+
+    Parameters
+    ----------
+    size : int
+        Number of bytes.
+
+    Returns
+    -------
+    str
+        The size, e.g. "512 bytes" or "1.5 MB".
+    """
+
+    if (size < 1024):
+        return "%d bytes" % size
+
+    for unit in ("KB", "MB"):
+        size /= 1024
+
+        if (size < 1024):
+            return "%.1f %s" % (size, unit)
+
+    return "%.1f GB" % (size / 1024)
+
+
+def choose_engine(engines, engine, grid_size, number_animals, simulation_duration,
+                  repeat_count, memory_budget, engine_count=1):
+    """
+    Checks that a simulation fits in a memory budget, switching to the most
+    compact engine if the requested one doesn't. Warns if that engine
+    doesn't model births (see array_engine.ArrayEngine).
+
+    Parameters
+    ----------
+    engines : dict
+        Engine classes by name, e.g. simulator.ENGINES.
+    engine : str
+        Name of the requested engine.
+    grid_size : int
+        The size of the grid.
+    number_animals : int
+        Number of animals at the beginning of the simulation.
+    simulation_duration : int
+        Number of time periods.
+    repeat_count : int
+        Number of repetitions kept in the results.
+    memory_budget : int
+        Bytes available.
+    engine_count : int, optional
+        Number of engines in memory at once. The default is 1.
+
+    Returns
+    -------
+    str
+        Name of the engine to use.
+
+    Raises
+    ------
+    MemoryError
+        If no engine fits in the budget.
+    """
+
+    estimates = {name: estimate_memory(profile_engine(engine_class), grid_size, number_animals,
+                                       simulation_duration, repeat_count, engine_count)
+                 for name, engine_class in engines.items()}
+
+    if (estimates[engine] <= memory_budget):
+        return engine
+
+    # most compact engine instead, if it fits
+    compact = min(estimates, key=estimates.get)
+
+    if (estimates[compact] <= memory_budget):
+        print("%s engine needs about %s, more than the budget of %s: using %s engine" % (
+            engine, format_bytes(estimates[engine]), format_bytes(memory_budget), compact))
+
+        if (not engines[compact].models_births):
+            warnings.warn("%s engine, used instead of %s engine, doesn't model births" % (
+                compact, engine), stacklevel=2)
+
+        return compact
+
+    raise MemoryError("simulation needs at least %s (%s engine), budget is %s" % (
+        format_bytes(estimates[compact]), compact, format_bytes(memory_budget)))
+
+
+def memory_report(engines, scales, simulation_duration=100, repeat_count=10):
+    """
+    Prints the measured bytes per cell and per animal of each engine at
+    each scale, and the bytes of the result buffers.
+
+    Parameters
+    ----------
+    engines : dict
+        Engine classes by name, e.g. simulator.ENGINES.
+    scales : list of tuples of ints
+        (grid_size, number_zebra, number_lion) of each scale to measure.
+    simulation_duration : int, optional
+        Number of time periods of the result buffers. The default is 100.
+    repeat_count : int, optional
+        Number of repetitions of the result buffers. The default is 10.
+
+    Returns
+    -------
+    rows : list of tuples
+        (engine, grid_size, number_animals, bytes_per_cell, bytes_per_animal,
+        result_bytes) for each engine and scale.
+    """
+
+    # both count matrices (zebras and lions) of run_whole_simulation
+    result_bytes = 2 * measure_count_buffer(repeat_count, simulation_duration)
+    rows = []
+
+    print("%-10s %9s %9s %14s %16s %14s" % ("engine", "grid", "animals", "bytes/cell",
+                                              "bytes/animal", "result bytes"))
+
+    for name, engine_class in engines.items():
+        # first use of an engine allocates caches which aren't per cell or animal
+        measure_engine(engine_class, 3, 1, 1)
+
+        for grid_size, number_zebra, number_lion in scales:
+            number_animals = number_zebra + number_lion
+
+            bytes_per_cell, bytes_per_animal = measure_costs(engine_class, grid_size,
+                                                             number_zebra, number_lion)
+
+            rows.append((name, grid_size, number_animals, bytes_per_cell, bytes_per_animal,
+                         result_bytes))
+
+            print("%-10s %9d %9d %14.1f %16.1f %14d" % rows[-1])
+
+    return rows
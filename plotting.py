@@ -0,0 +1,189 @@
+import sys
+import numpy as np
+from matplotlib.figure import Figure
+
+
+DESCRIPTION = "Initial random age = [0 : 1/2 max age].\n" \
+              "Max age random within fixed range.\n" \
+              "Reproduction at specific times.\n" \
+              "Lion will eat nearby zebra.\n" \
+              "Zebras avoid moving onto lions.\n" \
+              "Zebras NEVER die of hunger.\n"
+
+
+def save_results(results_file_name, zebra_count, lion_count):
+    """
+    Saves the number of zebras and lions of every repetition of a
+    simulation, so they can be plotted later or by another process.
+
+    Parameters
+    ----------
+    results_file_name : str
+        The file (.npz) the results are written to.
+    zebra_count : list of lists of ints
+        Number of zebras at each time period (columns) of each repetition (rows).
+    lion_count : list of lists of ints
+        Number of lions at each time period (columns) of each repetition (rows).
+
+    Returns
+    -------
+    None.
+    """
+
+    np.savez(results_file_name,
+             zebra_count=np.asarray(zebra_count, dtype=np.int64),
+             lion_count=np.asarray(lion_count, dtype=np.int64))
+
+
+def load_results(results_file_name):
+    """
+    Loads results written by save_results.
+
+    Parameters
+    ----------
+    results_file_name : str
+        The file (.npz) the results were written to.
+
+    Returns
+    -------
+    zebra_count : 2D array of ints
+        Number of zebras, shape (repeat_count, simulation_duration).
+    lion_count : 2D array of ints
+        Number of lions, shape (repeat_count, simulation_duration).
+    """
+
+    with np.load(results_file_name) as results:
+        return results["zebra_count"], results["lion_count"]
+
+
+def summarize_counts(counts, band="std", percentiles=(5, 95)):
+    """
+    Calculates the central line and the band around it for each time
+    period over all repetitions.
+
+    Parameters
+    ----------
+    counts : list of lists of ints
+        Number of individuals at each time period (columns) of each repetition (rows).
+    band : str, optional
+        "std" for mean +/- standard deviation, "percentile" for the median
+        and the given percentiles. The default is "std".
+    percentiles : tuple of two numbers, optional
+        Lower and upper percentiles of the band. The default is (5, 95).
+
+    Returns
+    -------
+    centre : array of floats
+        Mean ("std") or median ("percentile") of every time period.
+    lower : array of floats
+        Lower edge of the band of every time period.
+    upper : array of floats
+        Upper edge of the band of every time period.
+    """
+
+    counts = np.asarray(counts, dtype=float)
+
+    if (band == "std"):
+        centre = counts.mean(axis=0)
+        spread = counts.std(axis=0)
+        return centre, centre - spread, centre + spread
+
+    elif (band == "percentile"):
+        lower, centre, upper = np.percentile(counts, [percentiles[0], 50, percentiles[1]], axis=0)
+        return centre, lower, upper
+
+    else:
+        raise ValueError("band must be 'std' or 'percentile', not %r" % (band,))
+
+
+def plot_results(zebra_count, lion_count, image_file_name, band="std", percentiles=(5, 95)):
+    """
+    Plots the zebra and lion counts of all repetitions as a central line
+    with a confidence band, and saves the figure.
+
+    Parameters
+    ----------
+    zebra_count : list of lists of ints
+        Number of zebras at each time period (columns) of each repetition (rows).
+    lion_count : list of lists of ints
+        Number of lions at each time period (columns) of each repetition (rows).
+    image_file_name : str
+        The file the figure is saved to.
+    band : str, optional
+        "std" or "percentile", see summarize_counts. The default is "std".
+    percentiles : tuple of two numbers, optional
+        Lower and upper percentiles of a "percentile" band. The default is (5, 95).
+
+    Returns
+    -------
+    None.
+    """
+
+    repeat_count, simulation_duration = np.shape(zebra_count)
+
+    # Figure is used directly (not pyplot) so no global figure state is shared,
+    # taller than the default so the description fits below the axes
+    figure = Figure(figsize=(6.4, 7.2))
+    axes = figure.add_axes((.12, .33, .8, .58))
+
+    if (band == "std"):
+        label = "Average %s (+/- std)"
+    else:
+        label = "Median %s (" + "%g-%g" % percentiles + " percentile)"
+
+    # plot central line and band for each species with appropriate colour and label
+    for counts, colour, species in ((zebra_count, "r", "Zebra"), (lion_count, "b", "Lion")):
+        centre, lower, upper = summarize_counts(counts, band, percentiles)
+
+        axes.plot(centre, colour, label=label % species)
+        axes.fill_between(range(simulation_duration), lower, upper, color=colour, alpha=0.2)
+
+    # add axis labels
+    axes.set_xlabel("time")
+    axes.set_ylabel("Number of individuals")
+
+    axes.legend(loc="best")  # add legend
+
+    title = """
+            Simulation of %d time periods, repeated %d time%s.
+            """ % (simulation_duration, repeat_count, "s" if (repeat_count > 1) else "")
+
+    axes.set_title(title)
+
+    figure.text(0.5, 0.02, DESCRIPTION, fontsize="large", horizontalalignment="center")
+
+    # save plot to the specified file
+    figure.savefig(image_file_name)
+
+
+def plot_results_file(results_file_name, image_file_name, band="std", percentiles=(5, 95)):
+    """
+    Plots results saved by save_results, see plot_results.
+
+    Parameters
+    ----------
+    results_file_name : str
+        The file (.npz) the results were written to.
+    image_file_name : str
+        The file the figure is saved to.
+    band : str, optional
+        "std" or "percentile". The default is "std".
+    percentiles : tuple of two numbers, optional
+        Lower and upper percentiles of a "percentile" band. The default is (5, 95).
+
+    Returns
+    -------
+    None.
+    """
+
+    zebra_count, lion_count = load_results(results_file_name)
+    plot_results(zebra_count, lion_count, image_file_name, band, percentiles)
+
+
+if __name__ == "__main__":
+    # render saved results later: python plotting.py results.npz image.png [std|percentile]
+    if (len(sys.argv) < 3):
+        print("usage: python plotting.py RESULTS_FILE IMAGE_FILE [std|percentile]")
+        sys.exit(1)
+
+    plot_results_file(sys.argv[1], sys.argv[2], sys.argv[3] if (len(sys.argv) > 3) else "std")
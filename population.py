@@ -0,0 +1,274 @@
+import numpy as np
+from species import ZEBRA, LION, SPECIES_NAMES, MAX_AGE_RANGE, REPRODUCTION_TIME_RANGE
+
+PATTERNS = ("uniform", "clustered", "territories")
+
+
+class Population():
+    """
+    All the animals of a simulation stored as arrays, one entry per animal,
+    so they can be created and updated in bulk.
+    """
+
+    def __init__(self, row, column, species, age, max_age, reproduction_time,
+                 time_since_last_meal=None, time_since_reproduction=None):
+        """
+        Initializes a population from one array per attribute
+
+        Parameters
+        ----------
+        row, column : arrays of ints
+            Position of each animal.
+        species : array of ints
+            Species code (ZEBRA or LION) of each animal.
+        age, max_age, reproduction_time : arrays of ints
+            Same as the attributes of Animal.
+        time_since_last_meal, time_since_reproduction : arrays of ints, optional
+            Same as the attributes of Animal. The default is None (zeros).
+
+        Returns
+        -------
+        None.
+        """
+
+        self.row = np.asarray(row, dtype=np.int32)
+        self.column = np.asarray(column, dtype=np.int32)
+        self.species = np.asarray(species, dtype=np.int8)
+        self.age = np.asarray(age, dtype=np.int32)
+        self.max_age = np.asarray(max_age, dtype=np.int32)
+        self.reproduction_time = np.asarray(reproduction_time, dtype=np.int32)
+
+        if (time_since_last_meal is None):
+            time_since_last_meal = np.zeros(len(self.row), dtype=np.int32)
+
+        if (time_since_reproduction is None):
+            time_since_reproduction = np.zeros(len(self.row), dtype=np.int32)
+
+        self.time_since_last_meal = np.asarray(time_since_last_meal, dtype=np.int32)
+        self.time_since_reproduction = np.asarray(time_since_reproduction, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.row)
+
+    def get_state(self):
+        """
+        Summarizes the animals like simulator.get_state.
+
+        Returns
+        -------
+        list of tuples
+            One (row, col, species, age, max_age, reproduction_time,
+            time_since_last_meal, time_since_reproduction) tuple per animal,
+            sorted LRTB.
+        """
+
+        return sorted(zip(self.row.tolist(), self.column.tolist(),
+                          [SPECIES_NAMES[s] for s in self.species.tolist()],
+                          self.age.tolist(), self.max_age.tolist(),
+                          self.reproduction_time.tolist(),
+                          self.time_since_last_meal.tolist(),
+                          self.time_since_reproduction.tolist()))
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        Creates a population from a state as returned by simulator.get_state.
+
+        Parameters
+        ----------
+        state : list of tuples
+            The animals, one tuple each.
+
+        Returns
+        -------
+        Population
+            The same animals, as arrays.
+        """
+
+        columns = list(zip(*state)) if (len(state) > 0) else [[]] * 8
+        species = [SPECIES_NAMES.index(s) for s in columns[2]]
+
+        return cls(columns[0], columns[1], species, *columns[3:])
+
+    def copy(self):
+        """
+        Copies every array, so that an engine can update the copy (see
+        array_engine.ArrayEngine) without changing self.
+
+        Returns
+        -------
+        Population
+            The same animals, in new arrays.
+        """
+
+        return Population(self.row.copy(), self.column.copy(), self.species.copy(),
+                          self.age.copy(), self.max_age.copy(), self.reproduction_time.copy(),
+                          self.time_since_last_meal.copy(), self.time_since_reproduction.copy())
+
+
+def sample_free_cells(rng, free, count):
+    """
+    Samples cells without replacement among the free ones.
+
+    Parameters
+    ----------
+    rng : numpy.random.Generator
+        The random generator.
+    free : array of ints
+        Flat indices (row * grid_size + col) of the cells to sample from.
+    count : int
+        Number of cells to sample.
+
+    Returns
+    -------
+    array of ints
+        Flat indices of the sampled cells.
+    """
+
+    if (count > len(free)):
+        raise ValueError("%d animals don't fit in %d free cells" % (count, len(free)))
+
+    return rng.choice(free, size=count, replace=False)
+
+
+def sample_clustered_cells(rng, grid_size, taken, count, cluster_count, spread):
+    """
+    Samples cells without replacement around randomly placed cluster
+    centres (herds). Cells are drawn in bulk with a normal offset from
+    their centre, and the ones already taken are redrawn. If clusters are
+    too crowded, the remaining cells are sampled uniformly.
+
+    Parameters
+    ----------
+    rng : numpy.random.Generator
+        The random generator.
+    grid_size : int
+        The size of the grid.
+    taken : array of booleans
+        Flat occupancy of the grid, updated with the sampled cells.
+    count : int
+        Number of cells to sample.
+    cluster_count : int
+        Number of clusters.
+    spread : float
+        Standard deviation of the distance of cells from their centre.
+
+    Returns
+    -------
+    array of ints
+        Flat indices of the sampled cells.
+    """
+
+    centres = rng.integers(0, grid_size, size=(cluster_count, 2))
+    selected = []
+    remaining = count
+
+    # a few rounds of redrawing, crowded clusters are completed uniformly after
+    for attempt in range(8):
+
+        if (remaining == 0):
+            break
+
+        # draw more than needed, as some land on taken cells or each other
+        centre = centres[rng.integers(0, cluster_count, size=2 * remaining)]
+        offset = np.rint(rng.normal(0, spread, size=centre.shape)).astype(np.int64)
+        position = np.clip(centre + offset, 0, grid_size - 1)
+
+        cells = position[:, 0] * grid_size + position[:, 1]
+
+        # keep the first occurrence of each free cell, in drawing order
+        cells = cells[~taken[cells]]
+        cells = cells[np.sort(np.unique(cells, return_index=True)[1])][:remaining]
+
+        taken[cells] = True
+        selected.append(cells)
+        remaining -= len(cells)
+
+    if (remaining > 0):
+        cells = sample_free_cells(rng, np.flatnonzero(~taken), remaining)
+        taken[cells] = True
+        selected.append(cells)
+
+    return np.concatenate(selected) if (len(selected) > 0) else np.zeros(0, dtype=np.int64)
+
+
+def seed_population(grid_size, number_zebra, number_lion, pattern="uniform",
+                    rng=None, cluster_count=None, spread=None):
+    """
+    Creates all the animals of a simulation in bulk, each in its own cell.
+    Time and memory are linear in the number of cells and animals.
+
+    Parameters
+    ----------
+    grid_size : int
+        The size of the grid.
+    number_zebra : int
+        Number of zebras.
+    number_lion : int
+        Number of lions.
+    pattern : str, optional
+        How animals are spread on the grid. "uniform": anywhere;
+        "clustered": zebras in herds and lions in prides; "territories":
+        zebras in the left half of the grid and lions in the right half.
+        The default is "uniform".
+    rng : numpy.random.Generator, optional
+        The random generator. The default is None (a new unseeded one).
+    cluster_count : int, optional
+        Number of herds (and prides) for "clustered". The default is None
+        (about one per 20 animals of the species).
+    spread : float, optional
+        Standard deviation of the distance of animals from the centre of
+        their herd for "clustered". The default is None (2 cells).
+
+    Returns
+    -------
+    Population
+        The animals, zebras first.
+    """
+
+    if (rng is None):
+        rng = np.random.default_rng()
+
+    counts = (number_zebra, number_lion)
+    cell_count = grid_size * grid_size
+
+    if (pattern == "uniform"):
+        cells = sample_free_cells(rng, np.arange(cell_count), number_zebra + number_lion)
+
+    elif (pattern == "clustered"):
+        taken = np.zeros(cell_count, dtype=bool)
+        cells = np.concatenate([
+            sample_clustered_cells(rng, grid_size, taken, count,
+                                   cluster_count or max(1, count // 20), spread or 2.0)
+            for count in counts])
+
+    elif (pattern == "territories"):
+        # territory of a species is a band of columns, zebras left and lions right
+        column = np.arange(cell_count) % grid_size
+        cells = np.concatenate([
+            sample_free_cells(rng, np.flatnonzero(column < (grid_size + 1) // 2), number_zebra),
+            sample_free_cells(rng, np.flatnonzero(column >= (grid_size + 1) // 2), number_lion)])
+
+    else:
+        raise ValueError("pattern must be one of %s, not %r" % (PATTERNS, pattern))
+
+    species = np.repeat(np.array([ZEBRA, LION], dtype=np.int8), counts)
+
+    # attributes of every animal drawn at once, from its species' ranges
+    max_age = np.empty(len(species), dtype=np.int32)
+    reproduction_time = np.empty(len(species), dtype=np.int32)
+
+    for code in (ZEBRA, LION):
+        is_species = (species == code)
+        max_age[is_species] = rng.integers(MAX_AGE_RANGE[code][0],
+                                           MAX_AGE_RANGE[code][1] + 1,
+                                           size=counts[code])
+        reproduction_time[is_species] = rng.integers(REPRODUCTION_TIME_RANGE[code][0],
+                                                     REPRODUCTION_TIME_RANGE[code][1] + 1,
+                                                     size=counts[code])
+
+    # initial random age = [0 : 1/2 max age], as for Animals which aren't new born
+    age = rng.integers(0, max_age // 2 + 1)
+
+    return Population(cells // grid_size, cells % grid_size, species, age,
+                      max_age, reproduction_time)
@@ -1,49 +1,54 @@
 import random
-import matplotlib.pyplot as plt
+import warnings
+import numpy as np
 import time as t
-from animal import Zebra, Lion
+import multiprocessing as mp
+from bisect import bisect_left
+from collections import namedtuple
+from itertools import count
+from animal import ANIMAL_CLASSES
+from species import ZEBRA, LION, SPECIES_NAMES, count_species
 from grid_cell import Grid_cell
+from population import Population, seed_population
+from array_engine import ArrayEngine
+from distance_field import hunting_fields
+from lifecycle import LifecycleScheduler
+from adaptive import run_adaptive_repeats
+from memory import choose_engine
+from plotting import save_results, plot_results_file
 
 
-def initialize_population(grid, grid_size, number_zebra, number_lion):
+def initialize_population(grid, grid_size, number_zebra, number_lion, pattern="uniform"):
     """
-    Initializes the grid by placing animals onto it.
+    Initializes the grid by placing animals onto it. Cells and attributes
+    are drawn in bulk (see population.seed_population), from a generator
+    seeded by the random module so random.seed still reproduces a run.
 
     Parameters
     ----------
-    number_lion
-    number_zebra
     grid : list of lists of Grid_cells (2D array of Grid_cells)
         All the cells in the simulation's grid with their indices
         correlating to their position.
     grid_size : int
         The size of the grid.
+    number_zebra : int
+        Number of zebras to place.
+    number_lion : int
+        Number of lions to place.
+    pattern : str, optional
+        "uniform", "clustered" or "territories", see
+        population.seed_population. The default is "uniform".
 
     Returns
     -------
-    animal_positions : list of tuples of ints
-        All the positions on the grid where animals are.
+    all_animals : list of Animals
+        The animals (zebras and lions) placed on the grid.
     """
 
-    # All possible position on the grid
-    all_positions = [(a, b) for a in range(grid_size) for b in range(grid_size)]
-    all_animals = []
-
-    # Create zebras, each in a grid cell
-    for i in range(number_zebra):
-        # Random choice from all_positions, which is removed from selection afterwards
-        position = all_positions.pop(random.randint(0, len(all_positions) - 1))
+    rng = np.random.default_rng(random.getrandbits(64))
+    population = seed_population(grid_size, number_zebra, number_lion, pattern, rng)
 
-        all_animals.append(Zebra(grid[position[0]][position[1]], False))
-
-    # Create lions, each in a grid cell
-    for i in range(number_lion):
-        # Random choice from all_positions, which is removed from selection afterwards
-        position = all_positions.pop(random.randint(0, len(all_positions) - 1))
-
-        all_animals.append(Lion(grid[position[0]][position[1]], False))
-
-    return all_animals
+    return animals_from_state(population.get_state(), grid)
 
 
 def print_grid(all_animals, grid_size):
@@ -57,18 +62,16 @@ def print_grid(all_animals, grid_size):
        Prints the grid
     """
 
-    # get the set of tuples where lions and zebras are located
-    lions_tuples = {a.get_position() for a in all_animals if a.species == "Lion"}
-    zebras_tuples = {a.get_position() for a in all_animals if a.species == "Zebra"}
+    # species code of the animal at each position where there is one
+    species_codes = {a.get_position(): a.species_code for a in all_animals}
 
     print("*" * (grid_size + 2))
     for row in range(grid_size):
         print("*", end="")
         for col in range(grid_size):
-            if (row, col) in lions_tuples:
-                print("L", end="")
-            elif (row, col) in zebras_tuples:
-                print("Z", end="")
+            if (row, col) in species_codes:
+                # first letter of the species' name, e.g. L for Lion
+                print(SPECIES_NAMES[species_codes[(row, col)]][0], end="")
             else:
                 print(" ", end="")
         print("*")
@@ -108,18 +111,17 @@ def sort_animals(all_animals):
        Sorts the list of animals
     """
 
+    # (row, col) tuples, so columns past 999 don't spill into the next row
     def get_key(a):
-        return a.get_row() + 0.001 * a.get_column()
+        return a.get_position()
 
     all_animals.sort(key=get_key)
 
 
 def sort_positions(animal_positions):
 
-    def get_key(a):
-        return a[0] + 0.001 * a[1]
-
-    animal_positions.sort(key=get_key)
+    # same order as sort_animals, which age_hunger relies on to bisect
+    animal_positions.sort()
 
 
 def remove_dead_animals(dead_index, all_animals, animal_positions):
@@ -153,7 +155,7 @@ def remove_dead_animals(dead_index, all_animals, animal_positions):
         del (animal_positions[i])
 
 
-def age_hunger(all_animals, animal_positions):
+def age_hunger(all_animals, animal_positions, scheduler=None):
     """
     Increases the age of animals and checks if they have died of
     hunger or of old age. Animals who die have their index placed
@@ -165,12 +167,26 @@ def age_hunger(all_animals, animal_positions):
         The animals (zebras and lions) in the simulation.
     animal_positions : list of tuples of ints
         The positions of the animals in the simulation.
+    scheduler : lifecycle.LifecycleScheduler, optional
+        If given, only the animals with a death due are checked, the
+        others' counters are increased later. The default is None.
 
     Returns
     -------
     None.
     """
 
+    if (scheduler != None):
+        # only the animals the scheduler finds dying, positions are sorted LRTB
+        dying = scheduler.advance()
+        dead_index = [bisect_left(animal_positions, animal.get_position()) for animal in dying]
+
+        for animal in dying:
+            animal.set_dead()
+
+        remove_dead_animals(dead_index, all_animals, animal_positions)
+        return
+
     dead_index = []  # list of animals that have died, to be removed after
     animal_index = 0  # keep track of the current animal's index
 
@@ -191,7 +207,8 @@ def age_hunger(all_animals, animal_positions):
     dead_index.clear()
 
 
-def move_animals(all_animals, animal_positions, grid):
+def move_animals(all_animals, animal_positions, grid, hunting_fields=None, scheduler=None,
+                 occupancy=None):
     """
     Manages the movement of all animals in the simulation every round.
     Each animal is checked in LRTB order for moving opportunity.
@@ -211,6 +228,17 @@ def move_animals(all_animals, animal_positions, grid):
     grid : list of lists of Grid_cells (2D array of Grid_cells)
         All the cells in the simulation's grid with their indices
         correlating to their position.
+    hunting_fields : list of 2D arrays of ints, optional
+        Distance to the nearest prey of each species, see
+        distance_field.hunting_fields. The default is None (no hunting).
+    scheduler : lifecycle.LifecycleScheduler, optional
+        If given, told about every meal to reschedule the eater's death of
+        hunger. The default is None.
+    occupancy : 2D array of ints, optional
+        Species code of the animal in each cell, -1 for empty cells (see
+        get_occupancy). If given, it's kept up to date with every move and
+        meal, and neighbours are looked up in it (see Animal.pick_neighbour)
+        instead of among all animals. The default is None.
 
     Returns
     -------
@@ -225,11 +253,23 @@ def move_animals(all_animals, animal_positions, grid):
         # only move if alive
         if (animal.alive):
             # potential new location (row, col)
-            selected_neighbour = animal.pick_neighbour(all_animals, animal_positions)
+            if (hunting_fields != None):
+                hunting_field = hunting_fields[animal.species_code]
+            else:
+                hunting_field = None
+
+            selected_neighbour = animal.pick_neighbour(all_animals, animal_positions, hunting_field,
+                                                       occupancy)
             move_position = selected_neighbour.position
 
+            if (occupancy is not None):
+                position = animal_positions[index_animal]
+                is_occupied = (occupancy[move_position] != -1)
+            else:
+                is_occupied = (move_position in animal_positions)
+
             # if new location is occupied -> save animal occupying it, check if eating happens
-            if (move_position in animal_positions):
+            if (is_occupied):
                 index_other = animal_positions.index(move_position)  # index of other animal
                 target_position_animal = all_animals[index_other]  # other animal
 
@@ -242,12 +282,19 @@ def move_animals(all_animals, animal_positions, grid):
                     # move the animal out of the way in the position list
                     animal_positions[index_other] = (-1, -1)
 
+                    if (scheduler != None):
+                        scheduler.meal(animal, target_position_animal)
+
                     animal.time_since_last_meal = 0  # refresh last meal of eater
 
                     # if current animal in loop can eat -> also moves
                     animal.set_position(grid[move_position[0]][move_position[1]])
                     animal_positions[index_animal] = move_position
 
+                    if (occupancy is not None):
+                        occupancy[position] = -1
+                        occupancy[move_position] = animal.species_code
+
                 elif (target_position_animal.can_eat(animal)):
                     # add index of animal that was moving to dead list
                     dead_index.append(index_animal)
@@ -256,14 +303,24 @@ def move_animals(all_animals, animal_positions, grid):
                     # move the animal out of the way in the position list
                     animal_positions[index_animal] = (-1, -1)
 
+                    if (scheduler != None):
+                        scheduler.meal(target_position_animal, animal)
+
                     # refresh last meal of eater
                     target_position_animal.time_since_last_meal = 0
 
+                    if (occupancy is not None):
+                        occupancy[position] = -1
+
             # location isn't occupied -> just move
             else:
                 animal.set_position(grid[move_position[0]][move_position[1]])
                 animal_positions[index_animal] = move_position
 
+                if (occupancy is not None):
+                    occupancy[position] = -1
+                    occupancy[move_position] = animal.species_code
+
         index_animal += 1
 
     # remove dead animals from animals in ecosystem list and reset death list for later
@@ -271,7 +328,7 @@ def move_animals(all_animals, animal_positions, grid):
     dead_index.clear()
 
 
-def reproduce_animals(all_animals, animal_positions):
+def reproduce_animals(all_animals, animal_positions, scheduler=None):
     """
     Manages the reproduction of all animals in the simulation every round.
     Each animal is checked in LRTB order for reproduction opportunity.
@@ -282,6 +339,9 @@ def reproduce_animals(all_animals, animal_positions):
         The animals (zebras and lions) in the simulation.
     animal_positions : list of tuples of ints
         The positions of the animals in the simulation.
+    scheduler : lifecycle.LifecycleScheduler, optional
+        If given, only the animals it finds able to reproduce are checked,
+        and it schedules the children. The default is None.
 
     Returns
     -------
@@ -290,7 +350,12 @@ def reproduce_animals(all_animals, animal_positions):
 
     children = []  # new animals to be added to the simulation
 
-    for animal in all_animals:
+    if (scheduler != None):
+        candidates = scheduler.due_reproductions()
+    else:
+        candidates = all_animals
+
+    for animal in candidates:
 
         if (animal.can_reproduce()):
             offspring_cell = animal.get_offspring_position(all_animals, animal_positions)
@@ -301,143 +366,648 @@ def reproduce_animals(all_animals, animal_positions):
                 children.append(animal.get_child(offspring_cell))
                 animal_positions.append(offspring_cell.get_position())
 
+    if (scheduler != None):
+        scheduler.reproduced(candidates)
+
+        for child in children:
+            scheduler.add(child)
+
     # add children to all_animals list
     all_animals.extend(children)
 
 
-def run_whole_simulation(grid_size, simulation_duration,
-                         repeat_count, number_zebra, number_lion):
+def create_grid(grid_size, metric="chebyshev"):
+    """
+    Creates the grid of the simulation, each cell able to find its neighbours.
+
+    Parameters
+    ----------
+    grid_size : int
+        The size of the grid.
+    metric : str, optional
+        Shape of the rings, "chebyshev" or "manhattan", see
+        stencil.distance. The default is "chebyshev".
+
+    Returns
+    -------
+    grid : list of lists of Grid_cells (2D array of Grid_cells)
+        All the cells in the simulation's grid with their indices
+        correlating to their position.
+    """
+
+    # List of grid cells, with the indices (i,j) representing (row,col)
+    grid = [[Grid_cell((a, b), metric) for b in range(grid_size)] for a in range(grid_size)]
+
+    # Let each cell know the grid its neighbours are in
+    for i in range(len(grid)):
+
+        for j in range(len(grid[i])):
+            grid[i][j].define_neighbours(grid)
+
+    return grid
+
+
+def get_occupancy(all_animals, grid_size):
+    """
+    Creates the occupancy of the grid, as used by stencil.available_neighbours.
+
+    Parameters
+    ----------
+    all_animals : list of Animals
+        The animals (zebras and lions) in the simulation.
+    grid_size : int
+        The size of the grid.
+
+    Returns
+    -------
+    occupancy : 2D array of ints
+        Species code of the animal in each cell, -1 for empty cells.
+    """
+
+    occupancy = np.full((grid_size, grid_size), -1, dtype=np.int8)
+
+    for animal in all_animals:
+        occupancy[animal.get_position()] = animal.species_code
+
+    return occupancy
+
+
+def simulate_time_period(all_animals, animal_positions, grid, timings=None, sight_radius=0,
+                         scheduler=None, metric="chebyshev"):
+    """
+    Runs one time period (month) of the simulation: ageing and hunger,
+    movement and reproduction, each in LRTB order.
+
+    Parameters
+    ----------
+    all_animals : list of Animals
+        The animals (zebras and lions) in the simulation.
+    animal_positions : list of tuples of ints
+        The positions of the animals in the simulation.
+    grid : list of lists of Grid_cells (2D array of Grid_cells)
+        All the cells in the simulation's grid with their indices
+        correlating to their position.
+    timings : dict, optional
+        If given, the duration (seconds) of the "age_hunger", "move" and
+        "reproduce" phases are stored in it. The default is None.
+    sight_radius : int, optional
+        If above 0, predators hunt: they move towards the nearest prey within
+        sight_radius, found once per time period from all prey at once (see
+        distance_field.hunting_fields). The default is 0 (no hunting).
+    scheduler : lifecycle.LifecycleScheduler, optional
+        If given, ageing, hunger and reproduction only process the animals
+        with an event due. Counters of the others are then only exact after
+        scheduler.settle_all. The default is None.
+    metric : str, optional
+        Metric of the grid's cells (see create_grid), used for the distances
+        to prey when hunting. The default is "chebyshev".
+
+    Returns
+    -------
+    None.
+    """
+
+    phase_start = t.perf_counter()
+
+    sort_lists(all_animals, animal_positions)
+    age_hunger(all_animals, animal_positions, scheduler)
+    age_hunger_end = t.perf_counter()
+
+    # built once per time period, then kept up to date by every move
+    occupancy = get_occupancy(all_animals, len(grid))
+
+    if (sight_radius > 0):
+        fields = hunting_fields(occupancy, sight_radius, metric)
+    else:
+        fields = None
+
+    move_animals(all_animals, animal_positions, grid, fields, scheduler, occupancy)
+    move_end = t.perf_counter()
+
+    sort_lists(all_animals, animal_positions)
+    reproduce_animals(all_animals, animal_positions, scheduler)
+
+    if (timings != None):
+        timings["age_hunger"] = age_hunger_end - phase_start
+        timings["move"] = move_end - age_hunger_end
+        timings["reproduce"] = t.perf_counter() - move_end
+
+
+def get_state(all_animals):
+    """
+    Summarizes the animals of a simulation in a form that doesn't depend
+    on how an engine stores them, so that engines can be compared.
+
+    Parameters
+    ----------
+    all_animals : list of Animals
+        The animals (zebras and lions) in the simulation.
+
+    Returns
+    -------
+    list of tuples
+        One (row, col, species, age, max_age, reproduction_time,
+        time_since_last_meal, time_since_reproduction) tuple per animal,
+        sorted LRTB.
+    """
+
+    return sorted((a.get_row(), a.get_column(), a.species, a.age, a.MAX_AGE,
+                   a.REPRODUCTION_TIME, a.time_since_last_meal, a.time_since_reproduction)
+                  for a in all_animals)
+
+
+def animals_from_state(state, grid):
+    """
+    Creates the animals described by a state (see get_state) on grid.
+
+    Parameters
+    ----------
+    state : list of tuples
+        The animals, as returned by get_state.
+    grid : list of lists of Grid_cells (2D array of Grid_cells)
+        All the cells in the simulation's grid with their indices
+        correlating to their position.
+
+    Returns
+    -------
+    all_animals : list of Animals
+        The animals (zebras and lions) in the simulation.
+    """
+
+    all_animals = []
+
+    for (row, col, species, age, max_age, reproduction_time,
+         time_since_last_meal, time_since_reproduction) in state:
+
+        animal = ANIMAL_CLASSES[SPECIES_NAMES.index(species)](grid[row][col], True)
+
+        # overwrite the randomly drawn attributes with those of the state
+        animal.age = age
+        animal.MAX_AGE = max_age
+        animal.REPRODUCTION_TIME = reproduction_time
+        animal.time_since_last_meal = time_since_last_meal
+        animal.time_since_reproduction = time_since_reproduction
+
+        all_animals.append(animal)
+
+    return all_animals
+
+
+class ReferenceEngine():
+    """
+    The simulation as run by run_whole_simulation, wrapped so that other
+    engines can be tested against it (see differential.py).
+
+    Every engine takes (grid_size, state, seed, sight_radius=0,
+    metric="chebyshev"), where state is as returned by get_state (or a
+    population.Population), sight_radius enables hunting and metric is the
+    shape of neighbourhoods (see stencil.distance), and has step(timings=None), get_state(), get_counts()
+    and get_occupancy(). The engine keeps its own random stream, so engines
+    can be stepped side by side. Its models_births attribute is False if it
+    has no reproduction phase (see array_engine.ArrayEngine).
+    """
+
+    models_births = True
+
+    def __init__(self, grid_size, state, seed, sight_radius=0, metric="chebyshev"):
+        if (isinstance(state, Population)):
+            state = state.get_state()
+
+        # creating animals draws random attributes (overwritten by the state),
+        # which mustn't move the random module's stream
+        saved_state = random.getstate()
+
+        self.grid = create_grid(grid_size, metric)
+        self.all_animals = animals_from_state(state, self.grid)
+        self.animal_positions = [a.get_position() for a in self.all_animals]
+        self.sight_radius = sight_radius
+        self.metric = metric
+
+        # lifecycle events of every animal, see ScheduledEngine
+        self.scheduler = None
+
+        # own random stream, swapped in and out of the random module at every step
+        random.seed(seed)
+        self.random_state = random.getstate()
+        random.setstate(saved_state)
+
+    def step(self, timings=None):
+        saved_state = random.getstate()
+        random.setstate(self.random_state)
+
+        simulate_time_period(self.all_animals, self.animal_positions, self.grid, timings,
+                             self.sight_radius, self.scheduler, self.metric)
+
+        self.random_state = random.getstate()
+        random.setstate(saved_state)
+
+    def get_state(self):
+        return get_state(self.all_animals)
+
+    def get_counts(self):
+        counts = count_species(self.all_animals)
+        return counts[ZEBRA], counts[LION]
+
+    def get_occupancy(self):
+        # no arrays behind the objects, so the occupancy is built every time
+        return get_occupancy(self.all_animals, len(self.grid))
+
+
+class ScheduledEngine(ReferenceEngine):
+    """
+    The reference simulation with a lifecycle scheduler (see
+    lifecycle.LifecycleScheduler): ageing, hunger and reproduction only
+    process the animals with an event due in each time period, instead of
+    every animal. Draws the same random numbers as the reference, so
+    differential.compare_exact applies.
+    """
+
+    def __init__(self, grid_size, state, seed, sight_radius=0, metric="chebyshev"):
+        ReferenceEngine.__init__(self, grid_size, state, seed, sight_radius, metric)
+
+        self.scheduler = LifecycleScheduler(self.all_animals)
+
+    def get_state(self):
+        # counters of the animals without a due event are behind
+        self.scheduler.settle_all(self.all_animals)
+
+        return get_state(self.all_animals)
+
+
+# engines run_whole_simulation can use, by name
+ENGINES = {"reference": ReferenceEngine, "array": ArrayEngine, "scheduled": ScheduledEngine}
+
+# what a simulation is run with; simulation_duration can be None for iter_steps
+SimulationConfig = namedtuple("SimulationConfig",
+                              ["grid_size", "simulation_duration", "number_zebra", "number_lion",
+                               "pattern", "engine", "sight_radius", "metric"],
+                              defaults=["uniform", "reference", 0, "chebyshev"])
+
+# state of a simulation after a time period, yielded by iter_steps
+StepSnapshot = namedtuple("StepSnapshot",
+                          ["time", "zebra_count", "lion_count", "occupancy", "timings"])
+
+
+def split_seed(seed):
+    """
+    Derives independent random streams for the initial animals and for the
+    engine from one seed, so that the engine doesn't replay the numbers the
+    animals were placed with.
+
+    Parameters
+    ----------
+    seed : int
+        Seed of a simulation.
+
+    Returns
+    -------
+    population_rng : numpy.random.Generator
+        Generator of the initial animals, see population.seed_population.
+    engine_seed : int
+        Seed of the engine.
+    """
+
+    population_sequence, engine_sequence = np.random.SeedSequence(seed).spawn(2)
+
+    return (np.random.default_rng(population_sequence),
+            int(engine_sequence.generate_state(1, np.uint64)[0]))
+
+
+def iter_steps(config, seed, occupancy=False, timings=False, initial=None):
+    """
+    Runs a simulation lazily, one time period each time the next snapshot
+    is requested. Nothing is kept from one time period to the next, so the
+    consumer can filter, store or stop early as it likes.
+
+    Parameters
+    ----------
+    config : SimulationConfig
+        What to simulate. With simulation_duration None, time periods are
+        simulated until the consumer stops.
+    seed : int
+        Seed of the initial animals and of the engine, see split_seed.
+    occupancy : boolean, optional
+        If True, snapshots include the species code of the animal in each
+        cell (-1 for empty cells). With the array engine it's a read-only
+        view of the engine's own array, so it changes at the next time
+        period (copy it to keep it). The default is False.
+    timings : boolean, optional
+        If True, snapshots include the duration of each phase in a dict.
+        The default is False.
+    initial : population.Population, optional
+        Animals the simulation starts from instead of new ones, e.g. after
+        a burn-in (see run_burn_in). They are copied, so many simulations
+        can start from the same ones. The default is None (new animals
+        spread as config.pattern, seeded by seed).
+
+    Yields
+    ------
+    StepSnapshot
+        Time period, number of zebras and lions, and occupancy and phase
+        timings if requested (None otherwise).
+    """
+
+    population_rng, engine_seed = split_seed(seed)
+
+    if (initial is None):
+        population = seed_population(config.grid_size, config.number_zebra, config.number_lion,
+                                     config.pattern, population_rng)
+    else:
+        population = initial.copy()
+
+    simulation = ENGINES[config.engine](config.grid_size, population, engine_seed,
+                                        config.sight_radius, config.metric)
+
+    if (config.simulation_duration == None):
+        time_periods = count()
+    else:
+        time_periods = range(config.simulation_duration)
+
+    for time in time_periods:
+        phase_timings = {} if timings else None
+
+        simulation.step(phase_timings)
+        zebras, lions = simulation.get_counts()
+
+        yield StepSnapshot(time, zebras, lions,
+                           simulation.get_occupancy() if occupancy else None,
+                           phase_timings)
+
+
+def run_burn_in(config, burn_in, seed):
+    """
+    Runs the warm-up of a simulation once, so that many repetitions can
+    start from its end instead of each running it again.
+
+    Parameters
+    ----------
+    config : SimulationConfig
+        What to simulate, simulation_duration isn't used.
+    burn_in : int
+        Number of time periods of the warm-up.
+    seed : int
+        Seed of the initial animals and of the engine, see split_seed.
+
+    Returns
+    -------
+    population.Population
+        The animals at the end of the warm-up, see iter_steps.
+    """
+
+    population_rng, engine_seed = split_seed(seed)
+
+    population = seed_population(config.grid_size, config.number_zebra, config.number_lion,
+                                 config.pattern, population_rng)
+    simulation = ENGINES[config.engine](config.grid_size, population, engine_seed,
+                                        config.sight_radius, config.metric)
+
+    for time in range(burn_in):
+        simulation.step()
+
+    return Population.from_state(simulation.get_state())
+
+
+# animals at the end of the burn-ins repetitions start from, in every process
+# running repetitions (see set_burn_in_snapshots)
+burn_in_snapshots = []
+
+
+def set_burn_in_snapshots(snapshots):
+    """
+    Sets the snapshots run_repeat starts from in this process. Used as the
+    initializer of the processes running repetitions, so that snapshots are
+    sent once per process (or inherited, copy-on-write, by forked processes)
+    instead of once per repetition.
+
+    Parameters
+    ----------
+    snapshots : list of population.Population
+        Animals at the end of each burn-in, see run_burn_in.
+
+    Returns
+    -------
+    None.
+    """
+
+    burn_in_snapshots[:] = snapshots
+
+
+def run_repeat(grid_size, simulation_duration, number_zebra, number_lion,
+               pattern, engine, sight_radius, metric, burn_in, seed):
     """
-    
+    Runs one repetition of a simulation, used by the adaptive mode of
+    run_whole_simulation to run repetitions in other processes.
 
     Parameters
     ----------
     grid_size : int
         The size of the grid for the simulation.
     simulation_duration : int
-        Duration of an individual simulation (time periods).
-    repeat_count : int
-        Number of times to repeat a simulation to obtain an average.
+        Duration of the simulation (time periods).
     number_zebra : int
-        Number of zebras at the beginning of each repetition of a simulation.
+        Number of zebras at the beginning of the simulation.
     number_lion : int
-        Number of lions at the beginning of each repetition of a simulation..
+        Number of lions at the beginning of the simulation.
+    pattern : str
+        How animals are initially spread, see population.seed_population.
+    engine : str
+        Name of the engine in ENGINES.
+    sight_radius : int
+        Distance at which predators see prey when hunting, 0 for no hunting.
+    metric : str
+        Shape of neighbourhoods, "chebyshev" or "manhattan".
+    burn_in : int
+        If above 0, the repetition starts from one of the burn_in_snapshots
+        (chosen by seed) instead of new animals.
+    seed : int
+        Seed of the initial animals (without burn-in) and of the engine.
 
     Returns
     -------
-    None.
+    zebra_count : list of ints
+        Number of zebras at each time period.
+    lion_count : list of ints
+        Number of lions at each time period.
     """
 
-    # how many time periods will be completed overall
-    total_runs = repeat_count * simulation_duration
+    config = SimulationConfig(grid_size, simulation_duration, number_zebra, number_lion,
+                              pattern, engine, sight_radius, metric)
+    zebra_count, lion_count = [], []
 
-    # to store the number of zebras and lions every step (month)
-    zebra_count = [[0 for j in range(simulation_duration)] for k in range(repeat_count)]
-    lion_count = [[0 for j in range(simulation_duration)] for k in range(repeat_count)]
+    if (burn_in > 0):
+        initial = burn_in_snapshots[seed % len(burn_in_snapshots)]
+    else:
+        initial = None
 
-    print("")  # string management for console
+    for snapshot in iter_steps(config, seed, initial=initial):
+        zebra_count.append(snapshot.zebra_count)
+        lion_count.append(snapshot.lion_count)
 
-    start_time = t.time()
+    return zebra_count, lion_count
 
-    for repeat in range(repeat_count):
-        # List of grid cells, with the indices (i,j) representing (row,col)
-        grid = [[Grid_cell((a, b)) for b in range(grid_size)] for a in range(grid_size)]
 
-        # Let each cell create a list of neighbouring cells
-        for i in range(len(grid)):
-
-            for j in range(len(grid[i])):
-                grid[i][j].define_neighbours(grid)
+def run_whole_simulation(grid_size, simulation_duration,
+                         repeat_count, number_zebra, number_lion,
+                         results_file_name=None,
+                         pattern="uniform", engine="reference", target_half_width=None,
+                         max_repeats=1000, batch_size=None, processes=None,
+                         memory_budget=None, sight_radius=0, burn_in=0, burn_in_count=1,
+                         metric="chebyshev"):
+    """
+    Runs a simulation repeat_count times and collects the number of zebras
+    and lions at every time period of every repetition. Results can be saved,
+    to be plotted afterwards (see plotting.plot_results_file), so that sweeps
+    never wait for matplotlib.
 
-        all_animals = initialize_population(grid, grid_size, number_zebra, number_lion)  # initialize all animals
-        animal_positions = [a.get_position() for a in all_animals]  # get positions of animals
+    Parameters
+    ----------
+    grid_size : int
+        The size of the grid for the simulation.
+    simulation_duration : int
+        Duration of an individual simulation (time periods).
+    repeat_count : int
+        Number of times to repeat a simulation to obtain an average.
+    number_zebra : int
+        Number of zebras at the beginning of each repetition of a simulation.
+    number_lion : int
+        Number of lions at the beginning of each repetition of a simulation..
+    results_file_name : str, optional
+        File (.npz) the counts are saved to. The default is None (not saved).
+    pattern : str, optional
+        How animals are initially spread: "uniform", "clustered" or
+        "territories", see population.seed_population. The default is "uniform".
+    engine : str, optional
+        "reference" for the Animal and Grid_cell simulation, "array" for
+        the vectorized one without births, with a warning (see
+        array_engine.ArrayEngine), "scheduled" for the reference with
+        lifecycle events scheduled (see ScheduledEngine). The default is
+        "reference".
+    target_half_width : float, optional
+        If given, repetitions are run in parallel batches until the 95%
+        confidence interval of the mean number of zebras and of lions is at
+        most +/- target_half_width at every time period, see
+        adaptive.run_adaptive_repeats. repeat_count is then the size of the
+        first batch. The default is None (exactly repeat_count repetitions).
+    max_repeats : int, optional
+        Maximum number of repetitions with target_half_width. The default is 1000.
+    batch_size : int, optional
+        Repetitions added at each batch with target_half_width. The default
+        is None (one per process).
+    processes : int, optional
+        Number of processes running repetitions with target_half_width. The
+        default is None (number of CPUs).
+    memory_budget : int, optional
+        Bytes available. The memory of the simulation is estimated before
+        running it (see memory.choose_engine): if the engine doesn't fit, the
+        most compact one is used instead, and MemoryError is raised if none
+        fits. The default is None (not checked).
+    sight_radius : int, optional
+        If above 0, lions hunt: they move towards the nearest zebra within
+        sight_radius instead of randomly. The default is 0 (no hunting).
+    burn_in : int, optional
+        If above 0, a warm-up of burn_in time periods is run burn_in_count
+        times, and every repetition starts from the end of one of them
+        (spread evenly) with its own random stream, instead of running its
+        own warm-up. Counts start after the warm-up. The default is 0 (no
+        burn-in, each repetition starts from new animals).
+    burn_in_count : int, optional
+        Number of independent warm-ups with burn_in, at least 1. The default is 1.
+    metric : str, optional
+        Shape of neighbourhoods (where animals move and see prey):
+        "chebyshev" (the 8 surrounding cells) or "manhattan" (the 4 cells
+        sharing a side), see stencil.distance. The default is "chebyshev".
 
-        # run through the whole simulation
-        for time in range(simulation_duration):
+    Returns
+    -------
+    zebra_count : list of lists of ints
+        Number of zebras at each time period (columns) of each repetition (rows).
+    lion_count : list of lists of ints
+        Number of lions at each time period (columns) of each repetition (rows).
+    """
 
-            sort_lists(all_animals, animal_positions)
-            age_hunger(all_animals, animal_positions)
-            move_animals(all_animals, animal_positions, grid)
-            sort_lists(all_animals, animal_positions)
-            reproduce_animals(all_animals, animal_positions)
+    if (burn_in > 0 and burn_in_count < 1):
+        raise ValueError("burn_in_count must be at least 1, not %r" % (burn_in_count,))
 
-            """
-            if(time >= 30 or time <= 5): 
-                print(time)
-                print_grid(all_animals, grid_size)
-                print("")
-            """
+    # an engine switched to by choose_engine is warned about there
+    if (not ENGINES[engine].models_births):
+        warnings.warn("%s engine doesn't model births, its results will differ from the "
+                      "reference engine's once reproduction succeeds" % engine, stacklevel=2)
 
-            if (time % (simulation_duration // 5) == 0):
-                progress = repeat * simulation_duration + time
-                print("\r%d%% complete" % ((100 * progress) / total_runs), end="")
+    if (memory_budget != None):
+        if (target_half_width != None):
+            # one engine per process, and up to max_repeats repetitions kept
+            engine = choose_engine(ENGINES, engine, grid_size, number_zebra + number_lion,
+                                   simulation_duration, max_repeats, memory_budget,
+                                   processes or mp.cpu_count())
+        else:
+            engine = choose_engine(ENGINES, engine, grid_size, number_zebra + number_lion,
+                                   simulation_duration, repeat_count, memory_budget)
 
-            # stores the current number of zebras and lions for plotting
-            zebra_count[repeat][time] = (sum([1 for a in all_animals if a.species == "Zebra"]))
-            lion_count[repeat][time] = (sum([1 for a in all_animals if a.species == "Lion"]))
+    print("")  # string management for console
 
-    print("\r100% complete", end="")
-    print("")
+    start_time = t.time()
 
-    print(t.time() - start_time)
+    config = SimulationConfig(grid_size, simulation_duration, number_zebra, number_lion,
+                              pattern, engine, sight_radius, metric)
 
-    i, j = 0, 0
+    # warm-ups run once, repetitions fork from their end
+    if (burn_in > 0):
+        snapshots = [run_burn_in(config, burn_in, random.getrandbits(64))
+                     for i in range(burn_in_count)]
+    else:
+        snapshots = []
 
-    # calculate averages for each time period in a simulation over all repetitions
-    zebra_average = [(sum([zebra_count[i][j] for i in range(repeat_count)]) / repeat_count)
-                     for j in range(simulation_duration)]
-    lion_average = [(sum([lion_count[i][j] for i in range(repeat_count)]) / repeat_count)
-                    for j in range(simulation_duration)]
+    if (target_half_width != None):
+        # repeat until the mean counts are precise enough
+        arguments = (grid_size, simulation_duration, number_zebra, number_lion, pattern, engine,
+                     sight_radius, metric, burn_in)
+        zebra_count, lion_count = run_adaptive_repeats(run_repeat, arguments, target_half_width,
+                                                       repeat_count, max_repeats, batch_size,
+                                                       processes, initializer=set_burn_in_snapshots,
+                                                       initargs=(snapshots,))
+        print("")
 
-    # calculate medians for each time period in a simulation over all repetitions
-    # zebra_median = [(stat.median([zebra_count[i][j] for i in range(repeat_count)]))
-    #               for j in range(simulation_duration)]
-    # lion_median = [(stat.median([lion_count[i][j] for i in range(repeat_count)]))
-    #               for j in range(simulation_duration)]
+    else:
+        # how many time periods will be completed overall
+        total_runs = repeat_count * simulation_duration
 
-    # calculate modes for each time period in a simulation over all repetitions
-    # zebra_mode = [(stat.mode([zebra_count[i][j] for i in range(repeat_count)]))
-    #                 for j in range(simulation_duration)]
-    # lion_mode = [(stat.mode([lion_count[i][j] for i in range(repeat_count)]))
-    #               for j in range(simulation_duration)]
+        # to store the number of zebras and lions every step (month)
+        zebra_count = [[0 for j in range(simulation_duration)] for k in range(repeat_count)]
+        lion_count = [[0 for j in range(simulation_duration)] for k in range(repeat_count)]
 
-    # plot all stats lists with appropriate colour and label
-    plt.plot(zebra_average, "r", label="Average Zebra")
-    plt.plot(lion_average, "b", label="Average Lion")
-    # plt.plot(zebra_median, "tab:orange", label = "Med Z")
-    # plt.plot(lion_median, "tab:purple", label = "Med L")
-    # plt.plot(zebra_mode, "tab:pink", label = "Mod Z")
-    # plt.plot(lion_mode, "tab:cyan", label = "Mod L")
+        for repeat in range(repeat_count):
+            initial = snapshots[repeat % len(snapshots)] if (burn_in > 0) else None
 
-    # add axis labels
-    plt.xlabel("time")
-    plt.ylabel("Number of individuals")
+            # run through the whole simulation, seeded by the random module
+            for snapshot in iter_steps(config, random.getrandbits(64), initial=initial):
+                time = snapshot.time
 
-    plt.legend(loc="best")  # add legend
+                if (time % max(1, simulation_duration // 5) == 0):
+                    progress = repeat * simulation_duration + time
+                    print("\r%d%% complete" % ((100 * progress) / total_runs), end="")
 
-    title = """
-            Simulation of %d time periods, repeated %d time%s and averaged.
-            """ % (simulation_duration, repeat_count, "s" if (repeat_count > 1) else "")
+                # stores the current number of zebras and lions for plotting
+                zebra_count[repeat][time] = snapshot.zebra_count
+                lion_count[repeat][time] = snapshot.lion_count
 
-    plt.title(title)
+        print("\r100% complete", end="")
+        print("")
 
-    description = "Initial random age = [0 : 1/2 max age].\n" \
-                  "Max age random within fixed range.\n" \
-                  "Reproduction at specific times.\n" \
-                  "Lion will eat nearby zebra.\n" \
-                  "Zebras avoid moving onto lions.\n" \
-                  "Zebras NEVER die of hunger.\n"
+    print(t.time() - start_time)
 
-    plt.gca().set_position((.1, .2, .8, .7))
+    # save results so they can be plotted off the simulation's hot path
+    if (results_file_name != None):
+        save_results(results_file_name, zebra_count, lion_count)
 
-    plt.figtext(0.5, 0.0, description, fontsize="large", horizontalalignment="center")
+    return zebra_count, lion_count
 
-    # save plot to the specified file
-    # plt.savefig(image_file_name)
 
+if __name__ == "__main__":
+    run_whole_simulation(grid_size=20, simulation_duration=50,
+                         repeat_count=1, number_zebra=26,
+                         number_lion=10, results_file_name="simulation_results.npz")
 
-run_whole_simulation(grid_size=20, simulation_duration=50,
-                     repeat_count=1, number_zebra=26,
-                     number_lion=10)
+    print("Simulation complete")
 
-print("Simulation complete")
+    # plotted once the simulation is over
+    plot_results_file("simulation_results.npz", "simulation.png")
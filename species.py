@@ -0,0 +1,84 @@
+# Registry of the species of the simulation. Each species has a small integer
+# code indexing every table, so parameters are looked up instead of comparing
+# species names.
+
+# codes of the built-in species
+ZEBRA, LION = 0, 1
+
+SPECIES_NAMES = ["Zebra", "Lion"]
+
+# inclusive ranges the max age and reproduction time of an animal are drawn from
+MAX_AGE_RANGE = [(8, 10), (16, 22)]
+REPRODUCTION_TIME_RANGE = [(3, 4), (6, 8)]
+
+# time since last meal at which an animal dies of hunger, 0 if it never does
+HUNGER_LIMIT = [0, 6]
+
+# PREDATION[eater][meal] is True if an animal of species eater can eat one of species meal
+PREDATION = [[False, False],
+             [True, False]]
+
+
+def register_species(name, max_age_range, reproduction_time_range, hunger_limit,
+                     eats=(), eaten_by=()):
+    """
+    Adds a species to every table.
+
+    Parameters
+    ----------
+    name : str
+        Name of the species.
+    max_age_range : tuple of two ints
+        Inclusive range of the max age of an animal.
+    reproduction_time_range : tuple of two ints
+        Inclusive range of the reproduction time of an animal.
+    hunger_limit : int
+        Time since last meal at which an animal dies of hunger, 0 if never.
+    eats : list of ints, optional
+        Codes of the species it eats. The default is ().
+    eaten_by : list of ints, optional
+        Codes of the species that eat it. The default is ().
+
+    Returns
+    -------
+    int
+        The code of the new species.
+    """
+
+    code = len(SPECIES_NAMES)
+
+    SPECIES_NAMES.append(name)
+    MAX_AGE_RANGE.append(tuple(max_age_range))
+    REPRODUCTION_TIME_RANGE.append(tuple(reproduction_time_range))
+    HUNGER_LIMIT.append(hunger_limit)
+
+    # new column for the existing species, then the new species' row
+    for eater in range(code):
+        PREDATION[eater].append(eater in eaten_by)
+
+    PREDATION.append([meal in eats for meal in range(code + 1)])
+
+    return code
+
+
+def count_species(all_animals):
+    """
+    Counts the animals of each species.
+
+    Parameters
+    ----------
+    all_animals : list of Animals
+        The animals in the simulation.
+
+    Returns
+    -------
+    counts : list of ints
+        Number of animals of each species, indexed by species code.
+    """
+
+    counts = [0] * len(SPECIES_NAMES)
+
+    for animal in all_animals:
+        counts[animal.species_code] += 1
+
+    return counts
@@ -0,0 +1,168 @@
+from functools import lru_cache
+import numpy as np
+
+
+METRICS = ("chebyshev", "manhattan")
+
+
+def distance(row_offset, column_offset, metric="chebyshev"):
+    """
+    Calculates the grid distance of an offset from the origin.
+
+    Parameters
+    ----------
+    row_offset : int
+        Vertical offset.
+    column_offset : int
+        Horizontal offset.
+    metric : str, optional
+        "chebyshev" (rings are squares, the 8 immediate neighbours are at
+        distance 1) or "manhattan" (rings are diamonds, only the 4 cells
+        sharing a side are at distance 1). The default is "chebyshev".
+
+    Returns
+    -------
+    int
+        The distance.
+    """
+
+    if (metric == "chebyshev"):
+        return max(abs(row_offset), abs(column_offset))
+
+    elif (metric == "manhattan"):
+        return abs(row_offset) + abs(column_offset)
+
+    else:
+        raise ValueError("metric must be one of %s, not %r" % (METRICS, metric))
+
+
+@lru_cache(maxsize=None)
+def ring_offsets(radius, metric="chebyshev"):
+    """
+    Precomputes the offsets of the cells on every ring around a cell.
+
+    Parameters
+    ----------
+    radius : int
+        The furthest ring.
+    metric : str, optional
+        "chebyshev" or "manhattan", see distance. The default is "chebyshev".
+
+    Returns
+    -------
+    tuple of arrays of ints
+        Array n has shape (cells, 2), the (row, col) offsets of the cells
+        n + 1 units away, LRTB.
+    """
+
+    rings = [[] for d in range(radius)]
+
+    # 2 2 2 2 2      . . 2 . .
+    # 2 1 1 1 2      . 2 1 2 .
+    # 2 1 P 1 2      2 1 P 1 2
+    # 2 1 1 1 2      . 2 1 2 .
+    # 2 2 2 2 2      . . 2 . .
+    # chebyshev      manhattan
+    for i in range(-radius, radius + 1):
+
+        for j in range(-radius, radius + 1):
+            ring_distance_from_position = distance(i, j, metric)
+
+            if (0 < ring_distance_from_position <= radius):
+                rings[ring_distance_from_position - 1].append((i, j))
+
+    return tuple(np.array(ring, dtype=np.int64).reshape(-1, 2) for ring in rings)
+
+
+@lru_cache(maxsize=None)
+def ring_offset_tuples(radius, metric="chebyshev"):
+    """
+    Same offsets as ring_offsets, as tuples of Python ints, for the loops
+    over the neighbours of a single cell (see grid_cell.Grid_cell).
+
+    Parameters
+    ----------
+    radius : int
+        The furthest ring.
+    metric : str, optional
+        "chebyshev" or "manhattan", see distance. The default is "chebyshev".
+
+    Returns
+    -------
+    tuple of tuples of tuples of ints
+        Tuple n is the (row, col) offsets of the cells n + 1 units away, LRTB.
+    """
+
+    return tuple(tuple(map(tuple, ring.tolist())) for ring in ring_offsets(radius, metric))
+
+
+def neighbour_positions(position, grid_size, up_to_distance=1, metric="chebyshev"):
+    """
+    Finds the positions of the cells on every ring around a position,
+    clipped at the border of the grid.
+
+    Parameters
+    ----------
+    position : tuple of ints
+        The position (row, col) of the centre.
+    grid_size : int
+        The size of the grid.
+    up_to_distance : int, optional
+        The furthest ring. The default is 1.
+    metric : str, optional
+        "chebyshev" or "manhattan", see distance. The default is "chebyshev".
+
+    Returns
+    -------
+    list of arrays of ints
+        Array n has shape (cells, 2), the (row, col) of the cells n + 1
+        units away which are on the grid, LRTB.
+    """
+
+    rings = []
+
+    for offsets in ring_offsets(up_to_distance, metric):
+        positions = offsets + position
+
+        on_grid = ((positions >= 0) & (positions < grid_size)).all(axis=1)
+        rings.append(positions[on_grid])
+
+    return rings
+
+
+def available_neighbours(position, occupancy, up_to_distance=1, metric="chebyshev",
+                         allowed=(-1,)):
+    """
+    Finds the cells around a position whose occupant is allowed, directly
+    from the occupancy of the grid, without any list of neighbours per cell.
+    Time is proportional to the number of cells in the stencil.
+
+    Parameters
+    ----------
+    position : tuple of ints
+        The position (row, col) of the centre.
+    occupancy : 2D array of ints
+        Species code of the animal in each cell, -1 for empty cells.
+    up_to_distance : int, optional
+        The furthest ring. The default is 1.
+    metric : str, optional
+        "chebyshev" or "manhattan", see distance. The default is "chebyshev".
+    allowed : tuple of ints, optional
+        Occupancies of the cells to keep. The default is (-1,) (empty cells).
+
+    Returns
+    -------
+    list of arrays of ints
+        Array n has shape (cells, 2), the (row, col) of the allowed cells
+        n + 1 units away, LRTB.
+    """
+
+    allowed = np.asarray(allowed)
+    rings = []
+
+    for ring in neighbour_positions(position, len(occupancy), up_to_distance, metric):
+        # compared with each allowed value, cheaper than np.isin on a few cells
+        occupant = occupancy[ring[:, 0], ring[:, 1]]
+        rings.append(ring[(occupant[:, None] == allowed).any(axis=1)])
+
+    return rings
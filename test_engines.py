@@ -0,0 +1,55 @@
+import random
+import pytest
+from differential import compare_exact, compare_distributions
+from simulator import ScheduledEngine, run_whole_simulation
+from array_engine import ArrayEngine
+
+
+@pytest.mark.parametrize("sight_radius", [0, 3])
+@pytest.mark.parametrize("seed", range(3))
+def test_scheduled_engine_matches_reference(seed, sight_radius):
+    assert compare_exact(ScheduledEngine, 20, 60, 20, 25, seed,
+                         sight_radius=sight_radius) is None
+
+
+@pytest.mark.parametrize("sight_radius", [0, 3])
+def test_array_engine_counts_match_reference(sight_radius):
+    assert compare_distributions(ArrayEngine, 20, 60, 20, 15, range(20),
+                                 sight_radius=sight_radius) is None
+
+
+@pytest.mark.parametrize("sight_radius", [0, 3])
+def test_manhattan_neighbourhoods(sight_radius):
+    assert compare_exact(ScheduledEngine, 20, 60, 20, 25, 0, sight_radius=sight_radius,
+                         metric="manhattan") is None
+    assert compare_distributions(ArrayEngine, 20, 60, 20, 15, range(20),
+                                 sight_radius=sight_radius, metric="manhattan") is None
+
+
+def test_adaptive_runs_reproducible_across_processes():
+    counts = []
+
+    for processes in (1, 2):
+        random.seed(1)
+        counts.append(run_whole_simulation(20, 10, 2, 26, 10, target_half_width=0.01,
+                                           max_repeats=6, batch_size=2, processes=processes))
+
+    assert counts[0] == counts[1]
+
+
+def test_scheduled_engine_matches_reference_past_column_999():
+    # zebra at (0, 1005) dying of old age after one time period, sorted
+    # before the animals of the next row
+    state = [(0, 1005, "Zebra", 19, 20, 5, 0, 0), (1, 0, "Zebra", 0, 30, 5, 0, 0),
+             (5, 5, "Lion", 0, 40, 5, 0, 0)]
+
+    assert compare_exact(ScheduledEngine, 1010, 0, 0, 3, 0, state=state) is None
+
+
+def test_engines_without_births_warn():
+    with pytest.warns(UserWarning, match="doesn't model births"):
+        run_whole_simulation(20, 5, 1, 26, 10, engine="array")
+
+    # reference engine too large for the budget, array engine used instead
+    with pytest.warns(UserWarning, match="doesn't model births"):
+        run_whole_simulation(20, 5, 1, 26, 10, memory_budget=20000)